@@ -14,6 +14,7 @@ Usage:
 import os
 import json
 import argparse
+from functools import lru_cache
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
@@ -132,6 +133,7 @@ def agentic_loop(
 # Modes
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=1)
 def build_client() -> genai.Client:
     if GEMINI_API_KEY:
         return genai.Client(api_key=GEMINI_API_KEY)
@@ -7,6 +7,7 @@ Pour modifier le comportement du LLM (prompt, tools, boucle) : tout est ici.
 import json
 import logging
 import time
+from functools import lru_cache
 
 from fastapi import APIRouter, Depends, HTTPException
 from google import genai
@@ -59,6 +60,7 @@ class ChatResponse(BaseModel):
 # Boucle agentique Gemini
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=1)
 def _build_gemini_client() -> genai.Client:
     if GEMINI_API_KEY:
         return genai.Client(vertexai=True, api_key=GEMINI_API_KEY)
@@ -11,6 +11,7 @@ Combine :
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from api.communes.latresne.cuas.CERFA_ANALYSE.mistral_cerfa_info_extractor import extraire_info_cerfa
@@ -29,22 +30,21 @@ def analyser_cerfa_complet(pdf_path: str, output_path: str = "cerfa_complet.json
     print(f"📄 Analyse CERFA : {pdf_name}\n")
 
     # ============================================================
-    # 1️⃣ Infos générales
+    # 1️⃣ + 2️⃣ Infos générales et parcelles (appels LLM indépendants, en parallèle)
     # ============================================================
     print("1️⃣  Extraction des informations générales...")
-    info_result = extraire_info_cerfa(pdf_path)
+    print("2️⃣  Extraction des parcelles cadastrales...")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fut_info = pool.submit(extraire_info_cerfa, pdf_path)
+        fut_parcelles = pool.submit(extraire_parcelles_cerfa, pdf_path)
+        info_result = fut_info.result()
+        parcelles_result = fut_parcelles.result()
 
     if not info_result.get("success"):
         return {"success": False, "error": f"Infos générales : {info_result.get('error')}"}
 
     data_info = info_result["data"]
 
-    # ============================================================
-    # 2️⃣ Parcelles cadastrales
-    # ============================================================
-    print("\n2️⃣  Extraction des parcelles cadastrales...")
-    parcelles_result = extraire_parcelles_cerfa(pdf_path)
-
     if not parcelles_result.get("success"):
         return {"success": False, "error": f"Parcelles : {parcelles_result.get('error')}"}
 
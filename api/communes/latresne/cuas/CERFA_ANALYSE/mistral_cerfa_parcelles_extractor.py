@@ -5,12 +5,14 @@ Extraction des pages 2 et 4 → références cadastrales + superficie totale
 
 import os
 import re
-import base64
 import json
 from pathlib import Path
 from typing import List, Dict, Optional
-from mistralai import Mistral
 from pdf2image import convert_from_path
+
+from utils.fast_base64 import b64encode
+from utils.llm_clients import get_mistral_client
+
 from dotenv import load_dotenv
 load_dotenv()
 import logging
@@ -62,7 +64,7 @@ Retourne UNIQUEMENT le JSON."""
         self.api_key = api_key or os.getenv("MISTRAL_API_KEY")
         if not self.api_key:
             raise ValueError("MISTRAL_API_KEY requise")
-        self.client = Mistral(api_key=self.api_key)
+        self.client = get_mistral_client(self.api_key)
     
     def _pdf_pages_to_images(self, pdf_path: str, pages: List[int], dpi: int = 300) -> List[str]:
         """Convertit pages PDF en images base64"""
@@ -75,7 +77,7 @@ Retourne UNIQUEMENT le JSON."""
             images[0].save(tmp_path, "PNG")
             
             with open(tmp_path, "rb") as f:
-                images_b64.append(base64.b64encode(f.read()).decode())
+                images_b64.append(b64encode(f.read()).decode())
             
             os.remove(tmp_path)
         
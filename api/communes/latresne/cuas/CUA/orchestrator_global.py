@@ -29,12 +29,15 @@ from api.communes.latresne.cuas.CERFA_ANALYSE.mistral_analyse_cerfa_complet impo
 from api.communes.latresne.cuas.CERFA_ANALYSE.verification_unite_fonciere import verifier_unite_fonciere
 from api.communes.latresne.cuas.INTERSECTIONS.intersections import (
     CATALOGUE,
-    calculate_intersection,
+    calculate_intersections,
+    engine as intersections_engine,
     format_intersection_layer,
+    parcelle_area_sig,
+    write_rapport_html,
+    write_rapport_json,
 )
 from api.communes.latresne.cuas.INTERSECTIONS.intersection_modules.enrichment import enrich_intersections_rapport
 from api.communes.latresne.cuas.CUA.sub_orchestrator_cua import generer_visualisations_et_cua_depuis_wkt
-from sqlalchemy import create_engine, text
 
 # ============================================================
 # CONFIG
@@ -99,24 +102,9 @@ def _analyse_intersections_depuis_wkt(wkt_path: str, out_dir: Path):
     Fonction helper pour analyser les intersections depuis un fichier WKT.
     Reproduit la logique du CLI de intersections.py sans subprocess.
     """
-    # Configuration DB (identique à intersections.py)
-    SUPABASE_HOST = os.getenv('SUPABASE_HOST')
-    SUPABASE_DB = os.getenv('SUPABASE_DB')
-    SUPABASE_USER = os.getenv('SUPABASE_USER')
-    SUPABASE_PASSWORD = os.getenv('SUPABASE_PASSWORD')
-    SUPABASE_PORT = str(os.getenv('SUPABASE_PORT') or "5432").strip().strip('"').strip("'")
-    if SUPABASE_HOST and "pooler.supabase.com" in SUPABASE_HOST and SUPABASE_PORT == "5432":
-        logger.warning("SUPABASE_PORT=5432 detecte sur pooler; bascule auto vers 6543 (transaction mode).")
-        SUPABASE_PORT = "6543"
-    
-    DATABASE_URL = f"postgresql+psycopg2://{SUPABASE_USER}:{SUPABASE_PASSWORD}@{SUPABASE_HOST}:{SUPABASE_PORT}/{SUPABASE_DB}"
-    engine = create_engine(
-        DATABASE_URL,
-        pool_size=1,
-        max_overflow=0,
-        pool_pre_ping=True,
-        pool_recycle=1800,
-    )
+    # Pool du module intersections : un par processus (chaque job pipeline est un sous-processus),
+    # volontairement petit pour éviter le "MaxClientsInSessionMode" du pooler Supabase.
+    engine = intersections_engine
     
     # Lecture du WKT
     with open(wkt_path, "r", encoding="utf-8") as f:
@@ -125,11 +113,7 @@ def _analyse_intersections_depuis_wkt(wkt_path: str, out_dir: Path):
     logger.info(f"📐 Analyse des intersections depuis : {wkt_path}")
     
     # Calcul de la surface SIG
-    with engine.connect() as conn:
-        area_parcelle_sig = float(conn.execute(
-            text("SELECT ST_Area(ST_GeomFromText(:wkt, 2154))"),
-            {"wkt": parcelle_wkt}
-        ).scalar())
+    area_parcelle_sig = parcelle_area_sig(parcelle_wkt)
     
     # Récupérer superficie indicative depuis uf_json (transmise par verification_unite_fonciere)
     superficie_indicative = None
@@ -149,11 +133,12 @@ def _analyse_intersections_depuis_wkt(wkt_path: str, out_dir: Path):
         "intersections": {}
     }
     
-    # Analyse pour chaque table du catalogue
+    # Analyse pour chaque table du catalogue (couches calculées en parallèle)
+    resultats = calculate_intersections(parcelle_wkt, area_parcelle_sig)
     for table, config in CATALOGUE.items():
         logger.info(f"→ {table}")
         # Nouveau format intersections v10
-        objets, total_metric, metadata = calculate_intersection(parcelle_wkt, table, area_parcelle_sig)
+        objets, total_metric, metadata = resultats[table]
         layer = format_intersection_layer(config, objets, total_metric, area_parcelle_sig)
 
         if objets:
@@ -165,114 +150,19 @@ def _analyse_intersections_depuis_wkt(wkt_path: str, out_dir: Path):
 
     enrich_intersections_rapport(rapport, parcelle_wkt, engine)
 
-    # Relâcher explicitement le pool local de ce helper
-    engine.dispose()
-
     # Sauvegarde des rapports
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     out_json = out_dir / f"rapport_intersections_{timestamp}.json"
     out_html = out_dir / f"rapport_intersections_{timestamp}.html"
     
-    with open(out_json, "w", encoding="utf-8") as f:
-        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    write_rapport_json(out_json, rapport)
     
-    html = generate_html(rapport)
-    with open(out_html, "w", encoding="utf-8") as f:
-        f.write(html)
+    write_rapport_html(out_html, rapport)
     
     logger.info(f"✅ Rapports d'intersections exportés ({out_json}, {out_html})")
     return str(out_json)
 
 
-def generate_html(rapport):
-    """Génère le HTML du rapport d'intersections (copié depuis intersections.py)."""
-    parcelle = rapport['parcelle']
-    area = rapport['surface_m2']
-    results = rapport['intersections']
-    
-    # Grouper par type
-    by_type = {}
-    for table, data in results.items():
-        t = data['type']
-        if t not in by_type:
-            by_type[t] = []
-        by_type[t].append((table, data))
-    
-    html = f"""<!DOCTYPE html>
-<html lang="fr">
-<head>
-<meta charset="UTF-8">
-<title>Rapport {parcelle}</title>
-<style>
-body {{ font-family: Arial, sans-serif; margin: 20px; }}
-h1 {{ color: #333; }}
-.info {{ background: #f0f0f0; padding: 10px; margin-bottom: 20px; }}
-.type-section {{ margin-bottom: 30px; }}
-.type-header {{ background: #2c5aa0; color: white; padding: 10px; }}
-.couche {{ margin: 10px 0; padding: 10px; border: 1px solid #ddd; }}
-.couche h3 {{ margin: 0 0 10px 0; color: #2c5aa0; }}
-table {{ border-collapse: collapse; width: 100%; margin-top: 10px; }}
-th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-th {{ background: #f5f5f5; }}
-.no-intersect {{ color: #999; }}
-</style>
-</head>
-<body>
-<h1>Rapport d'intersection</h1>
-<div class="info">
-<strong>Parcelle:</strong> {parcelle}<br>
-<strong>Surface:</strong> {area:,.2f} m²
-</div>
-"""
-    
-    for type_name in sorted(by_type.keys()):
-        items = by_type[type_name]
-        intersected = [(t, d) for t, d in items if d['objets']]
-        
-        html += f"""
-<div class="type-section">
-<div class="type-header">
-<h2>{type_name.upper()} ({len(intersected)}/{len(items)} intersections)</h2>
-</div>
-"""
-        
-        for table, data in items:
-            if data['objets']:
-                html += f"""
-<div class="couche">
-<h3>✓ {data['nom']}</h3>
-<p><strong>Part concernée:</strong> {data['pct_sig']:.4f}% de la surface cadastrale indicative</p>
-"""
-                # Headers (exclure les colonnes de surfaces)
-                obj_keys = [k for k in data['objets'][0].keys() 
-                           if not k.lower().startswith("surface") 
-                           and not k.lower().endswith("_m2")]
-                
-                # Afficher le tableau seulement s'il y a des colonnes après filtrage
-                if obj_keys:
-                    html += "<table>\n<tr>\n"
-                    for key in obj_keys:
-                        html += f"<th>{key}</th>"
-                    html += "</tr>\n"
-                    
-                    # Rows (exclure les colonnes de surfaces)
-                    for obj in data['objets']:
-                        html += "<tr>"
-                        for key in obj_keys:
-                            html += f"<td>{obj.get(key, '')}</td>"
-                        html += "</tr>\n"
-                    
-                    html += "</table>\n"
-                
-                html += "</table></div>\n"
-            else:
-                html += f"""<div class="couche no-intersect"><h3>✗ {data['nom']}</h3><p>Aucune intersection</p></div>\n"""
-        
-        html += "</div>\n"
-    
-    html += "</body></html>"
-    return html
-
 # ============================================================
 # PIPELINE PRINCIPAL (IMPORTABLE)
 # ============================================================
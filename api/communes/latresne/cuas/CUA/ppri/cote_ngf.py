@@ -11,7 +11,7 @@ Analyse altimétrique d'une unité foncière (version WKT uniquement)
 import requests, numpy as np
 from shapely.geometry import Point
 from shapely import wkt
-from pyproj import Transformer
+from utils.geo import l93_to_wgs84
 from urllib.parse import urlencode
 
 # ================== CONFIG ==================
@@ -37,7 +37,7 @@ def sample_points_equitable(poly, max_points=MAX_POINTS):
 
 def fetch_altitudes(points):
     """Appelle l'API Altimétrie IGN via GET et renvoie les altitudes NGF"""
-    to_wgs84 = Transformer.from_crs(2154, 4326, always_xy=True).transform
+    to_wgs84 = l93_to_wgs84().transform
     pts_wgs = [to_wgs84(p.x, p.y) for p in points]
     lons = [f"{lon:.6f}" for lon, lat in pts_wgs]
     lats = [f"{lat:.6f}" for lon, lat in pts_wgs]
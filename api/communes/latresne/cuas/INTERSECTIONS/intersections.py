@@ -15,11 +15,19 @@ import os
 import re
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+import shapely
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 # WARNING pour limiter la RAM (logs verbeux désactivés temporairement)
 logging.basicConfig(level=logging.WARNING, format="%(levelname)s | %(message)s")
@@ -34,12 +42,21 @@ if SUPABASE_HOST and "pooler.supabase.com" in SUPABASE_HOST and SUPABASE_PORT ==
     logger.warning("SUPABASE_PORT=5432 detecte sur pooler; bascule auto vers 6543 (transaction mode).")
     SUPABASE_PORT = "6543"
 
+# Couches du catalogue calculées en parallèle (une connexion par worker).
+# Chaque job pipeline est un sous-processus avec son propre pool : garder ce nombre bas
+# (1–2) pour ne pas saturer le pooler Supabase (MaxClientsInSessionMode).
+INTERSECTIONS_MAX_WORKERS = max(1, int(os.getenv("INTERSECTIONS_MAX_WORKERS", "2")))
+
 DATABASE_URL = f"postgresql+psycopg2://{SUPABASE_USER}:{SUPABASE_PASSWORD}@{SUPABASE_HOST}:{SUPABASE_PORT}/{SUPABASE_DB}"
+# Limiter drastiquement le nombre de connexions ouvertes en mode pooler Supabase :
+# un pool par processus, dimensionné sur les workers, sans débordement.
 engine = create_engine(
     DATABASE_URL,
-    pool_size=1,
+    pool_size=INTERSECTIONS_MAX_WORKERS,
     max_overflow=0,
     pool_pre_ping=True,
+    # Le pooler Supabase coupe les connexions inactives : recycler avant
+    pool_recycle=300,
 )
 
 SCHEMA = "latresne"
@@ -179,6 +196,28 @@ def fetch_superficie_indicative(parcelles: list, code_insee: str) -> float:
         logger.warning(f"⚠️ Erreur récupération contenance base : {e}")
         return None
 
+@lru_cache(maxsize=8)
+def _parcelle_geom(parcelle_wkt: str):
+    return shapely.set_srid(shapely.from_wkt(parcelle_wkt), SRID)
+
+
+@lru_cache(maxsize=8)
+def _wkt_to_ewkb_hex(parcelle_wkt: str) -> str:
+    """
+    WKT → EWKB hex (SRID 2154), converti une fois par UF et réutilisé par toutes les couches :
+    moins d'octets envoyés et décodage binaire côté PostGIS au lieu du parseur WKT.
+    """
+    return shapely.to_wkb(_parcelle_geom(parcelle_wkt), hex=True, include_srid=True)
+
+
+def parcelle_area_sig(parcelle_wkt: str) -> float:
+    """
+    Surface SIG de l'UF (m², EPSG:2154) : même aire planaire que ST_Area,
+    calculée localement sur la géométrie déjà parsée (pas d'aller-retour DB).
+    """
+    return float(shapely.area(_parcelle_geom(parcelle_wkt)))
+
+
 def get_parcelle_geometry(section, numero):
     query = text("SELECT ST_AsText(geom_2154) FROM latresne.parcelles WHERE section = :s AND numero = :n")
     with engine.connect() as conn:
@@ -188,13 +227,16 @@ def get_parcelle_geometry(section, numero):
             return row[0]
         raise ValueError(f"Parcelle {section} {numero} introuvable")
 
-def calculate_intersection(parcelle_wkt, table_name, area_parcelle_sig):
+def calculate_intersection(parcelle_wkt, table_name, area_parcelle_sig, conn=None):
     """
     Intersection UF × couche catalogue selon geom_type :
       - surfacique : aire d'intersection, seuil 0,01 m² + 1 % UF (min_pct_sig)
       - lineaire   : longueur d'intersection, seuil 0,01 m
       - ponctuel   : ST_Within (présence dans l'UF)
 
+    conn : connexion partagée par la boucle sur le catalogue (une seule connexion /
+    pre-ping pour toutes les couches) ; sinon une connexion est ouverte par appel.
+
     Retourne (objets, total_metric, metadata).
     total_metric = aire union (surfacique) | longueur totale (lineaire) | 0 (ponctuel).
     """
@@ -225,27 +267,82 @@ def calculate_intersection(parcelle_wkt, table_name, area_parcelle_sig):
     logger.info(f"→ group_by = {group_by or 'Aucun'}")
 
     sql_params = {
-        "wkt": parcelle_wkt,
+        "ewkb": _wkt_to_ewkb_hex(parcelle_wkt),
         "surface_sig": float(area_parcelle_sig or 0),
         "min_pct_sig": min_pct_sig,
     }
 
-    with engine.connect() as conn:
-        try:
-            if geom_type == "lineaire":
-                return _calculate_lineaire(conn, table_sql, geom_col, keep_cols, sql_params)
-            if geom_type == "ponctuel":
-                return _calculate_ponctuel(conn, table_sql, geom_col, keep_cols, sql_params)
-            if group_by:
-                return _calculate_surfacique_group_by(
-                    conn, table_sql, geom_col, keep_cols, group_by, sql_params
-                )
-            return _calculate_surfacique_simple(
-                conn, table_sql, geom_col, keep_cols, sql_params, area_parcelle_sig
+    def _run(c):
+        if geom_type == "lineaire":
+            return _calculate_lineaire(c, table_sql, geom_col, keep_cols, sql_params)
+        if geom_type == "ponctuel":
+            return _calculate_ponctuel(c, table_sql, geom_col, keep_cols, sql_params)
+        if group_by:
+            return _calculate_surfacique_group_by(
+                c, table_sql, geom_col, keep_cols, group_by, sql_params
             )
-        except Exception as e:
-            logger.error(f"💥 {table_name}: {e}")
-            return [], 0.0, {"nb_raw": 0, "nb_grouped": 0, "items": []}
+        return _calculate_surfacique_simple(
+            c, table_sql, geom_col, keep_cols, sql_params, area_parcelle_sig
+        )
+
+    try:
+        if conn is None:
+            with engine.connect() as own_conn:
+                return _run(own_conn)
+        # Savepoint : une couche en erreur n'invalide pas la transaction partagée
+        with conn.begin_nested():
+            return _run(conn)
+    except Exception as e:
+        logger.error(f"💥 {table_name}: {e}")
+        return [], 0.0, {"nb_raw": 0, "nb_grouped": 0, "items": []}
+
+
+def calculate_intersections(parcelle_wkt, area_parcelle_sig, tables=None):
+    """
+    calculate_intersection sur toutes les couches du catalogue (ou `tables`), en parallèle.
+
+    Les couches sont réparties en INTERSECTIONS_MAX_WORKERS lots ; chaque worker ouvre
+    une connexion et enchaîne ses couches dessus (savepoint par couche). Le temps est
+    dominé par PostGIS et psycopg2 relâche le GIL pendant les requêtes : des threads suffisent.
+    Ne pas appeler en détenant déjà une connexion de `engine` (pool dimensionné sur les workers).
+
+    Retourne {table: (objets, total_metric, metadata)} dans l'ordre du catalogue.
+    """
+    tables = list(CATALOGUE if tables is None else tables)
+    if not tables:
+        return {}
+    n_workers = min(INTERSECTIONS_MAX_WORKERS, len(tables))
+    lots = [tables[i::n_workers] for i in range(n_workers)]
+
+    def _run_lot(lot):
+        # Connexion prise dans le try de chaque couche : pool épuisé ou pooler saturé
+        # → couche vide (loguée), pas d'abandon du rapport entier.
+        out = {}
+        conn = None
+        try:
+            for table in lot:
+                try:
+                    if conn is None:
+                        conn = engine.connect()
+                    out[table] = calculate_intersection(
+                        parcelle_wkt, table, area_parcelle_sig, conn=conn
+                    )
+                except Exception as e:
+                    logger.error(f"💥 {table}: connexion indisponible ({e})")
+                    out[table] = ([], 0.0, {"nb_raw": 0, "nb_grouped": 0, "items": []})
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+        finally:
+            if conn is not None:
+                conn.close()
+        return out
+
+    resultats = {}
+    with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="intersections") as ex:
+        for res in ex.map(_run_lot, lots):
+            resultats.update(res)
+    return {table: resultats[table] for table in tables}
 
 
 def _calculate_surfacique_simple(conn, table_sql, geom_col, keep_cols, sql_params, area_parcelle_sig):
@@ -255,13 +352,15 @@ def _calculate_surfacique_simple(conn, table_sql, geom_col, keep_cols, sql_param
 
     q = f"""
         WITH p AS (
-            SELECT ST_MakeValid(ST_GeomFromText(:wkt, {SRID})) AS g
+            SELECT ST_MakeValid(ST_GeomFromEWKB(decode(:ewkb, 'hex'))) AS g
         ),
         inter_raw AS (
+            -- `&&` sur la colonne brute : ST_MakeValid(t.geom) masque l'index GiST
             SELECT {t_cols}
                    ST_Intersection(ST_MakeValid(t.{geom_col}), p.g) AS inter_geom
             FROM {SCHEMA}.{table_sql} t, p
             WHERE t.{geom_col} IS NOT NULL
+              AND t.{geom_col} && p.g
               AND ST_Intersects(ST_MakeValid(t.{geom_col}), p.g)
         ),
         inter_filtered AS (
@@ -333,7 +432,7 @@ def _calculate_surfacique_group_by(conn, table_sql, geom_col, keep_cols, group_b
 
     q = f"""
         WITH p AS (
-            SELECT ST_MakeValid(ST_GeomFromText(:wkt, {SRID})) AS g
+            SELECT ST_MakeValid(ST_GeomFromEWKB(decode(:ewkb, 'hex'))) AS g
         ),
         raw_inter AS (
             SELECT
@@ -342,6 +441,7 @@ def _calculate_surfacique_group_by(conn, table_sql, geom_col, keep_cols, group_b
                 {raw_inter_attrs}
             FROM {SCHEMA}.{table_sql} t, p
             WHERE t.{geom_col} IS NOT NULL
+              AND t.{geom_col} && p.g
               AND ST_Intersects(ST_MakeValid(t.{geom_col}), p.g)
         ),
         filtered_inter AS (
@@ -429,20 +529,26 @@ def _calculate_lineaire(conn, table_sql, geom_col, keep_cols, sql_params):
 
     q = f"""
         WITH p AS (
-            SELECT ST_MakeValid(ST_GeomFromText(:wkt, {SRID})) AS g
+            SELECT ST_MakeValid(ST_GeomFromEWKB(decode(:ewkb, 'hex'))) AS g
         ),
         inter_raw AS (
             SELECT {t_cols}
                    ST_Intersection(ST_MakeValid(t.{geom_col}), p.g) AS inter_geom
             FROM {SCHEMA}.{table_sql} t, p
             WHERE t.{geom_col} IS NOT NULL
+              AND t.{geom_col} && p.g
               AND ST_Intersects(ST_MakeValid(t.{geom_col}), p.g)
               AND ST_Length(ST_Intersection(ST_MakeValid(t.{geom_col}), p.g))
                   > {MIN_INTERSECTION_LENGTH_M}
+        ),
+        inter AS (
+            SELECT DISTINCT ON (ST_AsBinary(inter_geom){dedup_cols})
+                   {raw_cols} ST_Length(inter_geom) AS metric
+            FROM inter_raw
         )
-        SELECT DISTINCT ON (ST_AsBinary(inter_geom){dedup_cols})
-               {raw_cols} ST_Length(inter_geom) AS metric
-        FROM inter_raw
+        SELECT {raw_cols} metric,
+               SUM(metric) OVER () AS total_length
+        FROM inter
     """
 
     rs = conn.execute(text(q), sql_params)
@@ -451,11 +557,14 @@ def _calculate_lineaire(conn, table_sql, geom_col, keep_cols, sql_params):
 
     objects = []
     total_length = 0.0
-    for row in rows:
+    for i, row in enumerate(rows):
         d = dict(zip(cols, row))
         length = float(d.pop("metric", 0) or 0)
+        if i == 0:
+            total_length = float(d.pop("total_length", 0) or 0)
+        else:
+            d.pop("total_length", None)
         d["longueur_inter_m"] = round(length, 2)
-        total_length += length
         objects.append(_convert_row_types(d))
 
     return objects, total_length, {
@@ -472,7 +581,7 @@ def _calculate_ponctuel(conn, table_sql, geom_col, keep_cols, sql_params):
 
     q = f"""
         WITH p AS (
-            SELECT ST_MakeValid(ST_GeomFromText(:wkt, {SRID})) AS g
+            SELECT ST_MakeValid(ST_GeomFromEWKB(decode(:ewkb, 'hex'))) AS g
         )
         SELECT DISTINCT ON (ST_AsBinary(t.{geom_col}){dedup_cols})
                {raw_cols} NULL::float AS metric
@@ -558,11 +667,7 @@ def analyse_parcelle(section, numero):
     
     parcelle_wkt = get_parcelle_geometry(section, numero)
     
-    with engine.connect() as conn:
-        area_parcelle_sig = float(conn.execute(
-            text("SELECT ST_Area(ST_GeomFromText(:wkt, 2154))"),
-            {"wkt": parcelle_wkt}
-        ).scalar())
+    area_parcelle_sig = parcelle_area_sig(parcelle_wkt)
     
     rapport = {
         "parcelle": f"{section} {numero}",
@@ -570,10 +675,12 @@ def analyse_parcelle(section, numero):
         "intersections": {}
     }
     
+    # Couches du catalogue calculées en parallèle (connexion de surface déjà rendue au pool)
+    resultats = calculate_intersections(parcelle_wkt, area_parcelle_sig)
     for table, config in CATALOGUE.items():
         logger.info(f"→ {table}")
-        
-        objets, total_metric, metadata = calculate_intersection(parcelle_wkt, table, area_parcelle_sig)
+    
+        objets, total_metric, metadata = resultats[table]
         layer = format_intersection_layer(config, objets, total_metric, area_parcelle_sig)
 
         if objets:
@@ -595,7 +702,28 @@ def analyse_parcelle(section, numero):
     enrich_intersections_rapport(rapport, parcelle_wkt, engine)
     return rapport
 
-def generate_html(rapport):
+def write_rapport_json(path, rapport: dict) -> None:
+    """
+    Écrit le rapport d'intersections en JSON indenté UTF-8.
+    orjson (encodeur C) si disponible, sinon json standard (ex. type non supporté par orjson).
+    """
+    if orjson is not None:
+        try:
+            Path(path).write_bytes(
+                orjson.dumps(rapport, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            )
+            return
+        except orjson.JSONEncodeError:
+            pass
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False)
+
+
+def generate_html_stream(rapport):
+    """
+    Rapport HTML d'intersections produit morceau par morceau (générateur) :
+    écrit directement dans le fichier via writelines, sans construire la chaîne complète.
+    """
     parcelle = rapport['parcelle']
     area = rapport['surface_m2']
     results = rapport['intersections']
@@ -608,7 +736,7 @@ def generate_html(rapport):
             by_type[t] = []
         by_type[t].append((table, data))
     
-    html = f"""<!DOCTYPE html>
+    yield f"""<!DOCTYPE html>
 <html lang="fr">
 <head>
 <meta charset="UTF-8">
@@ -639,7 +767,7 @@ th {{ background: #f5f5f5; }}
         items = by_type[type_name]
         intersected = [(t, d) for t, d in items if d['objets']]
         
-        html += f"""
+        yield f"""
 <div class="type-section">
 <div class="type-header">
 <h2>{type_name.upper()} ({len(intersected)}/{len(items)} intersections)</h2>
@@ -648,7 +776,7 @@ th {{ background: #f5f5f5; }}
         
         for table, data in items:
             if data['objets']:
-                html += f"""
+                yield f"""
 <div class="couche">
 <h3>✓ {data['nom']}</h3>
 <p><strong>Part concernée:</strong> {data['pct_sig']:.4f}% de la surface cadastrale indicative</p>
@@ -660,28 +788,33 @@ th {{ background: #f5f5f5; }}
                 
                 # Afficher le tableau seulement s'il y a des colonnes après filtrage
                 if obj_keys:
-                    html += "<table>\n<tr>\n"
-                    for key in obj_keys:
-                        html += f"<th>{key}</th>"
-                    html += "</tr>\n"
+                    yield "<table>\n<tr>\n"
+                    yield "".join(f"<th>{key}</th>" for key in obj_keys)
+                    yield "</tr>\n"
                     
-                    # Rows (exclure les colonnes de surfaces)
+                    # Rows (exclure les colonnes de surfaces), une ligne par morceau
                     for obj in data['objets']:
-                        html += "<tr>"
-                        for key in obj_keys:
-                            html += f"<td>{obj.get(key, '')}</td>"
-                        html += "</tr>\n"
+                        yield "<tr>" + "".join(f"<td>{obj.get(key, '')}</td>" for key in obj_keys) + "</tr>\n"
                     
-                    html += "</table>\n"
+                    yield "</table>\n"
                 
-                html += "</div>\n"
+                yield "</div>\n"
             else:
-                html += f"""<div class="couche no-intersect"><h3>✗ {data['nom']}</h3><p>Aucune intersection</p></div>\n"""
+                yield f"""<div class="couche no-intersect"><h3>✗ {data['nom']}</h3><p>Aucune intersection</p></div>\n"""
         
-        html += "</div>\n"
+        yield "</div>\n"
     
-    html += "</body></html>"
-    return html
+    yield "</body></html>"
+
+
+def generate_html(rapport):
+    return "".join(generate_html_stream(rapport))
+
+
+def write_rapport_html(path, rapport: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(generate_html_stream(rapport))
+
 
 if __name__ == "__main__":
     import argparse
@@ -705,11 +838,7 @@ if __name__ == "__main__":
         raise SystemExit("Fournir soit (--section & --numero) soit --geom-wkt")
 
     # Calcul surface
-    with engine.connect() as conn:
-        area_parcelle_sig = float(conn.execute(
-            text("SELECT ST_Area(ST_GeomFromText(:wkt, 2154))"),
-            {"wkt": parcelle_wkt}
-        ).scalar())
+    area_parcelle_sig = parcelle_area_sig(parcelle_wkt)
 
     rapport = {
         "parcelle": f"{section} {numero}",
@@ -717,10 +846,11 @@ if __name__ == "__main__":
         "intersections": {}
     }
 
-    # Lancer l'analyse
+    # Lancer l'analyse (couches en parallèle)
+    resultats = calculate_intersections(parcelle_wkt, area_parcelle_sig)
     for table, config in CATALOGUE.items():
         logger.info(f"→ {table}")
-        objets, total_metric, metadata = calculate_intersection(parcelle_wkt, table, area_parcelle_sig)
+        objets, total_metric, metadata = resultats[table]
         layer = format_intersection_layer(config, objets, total_metric, area_parcelle_sig)
 
         if objets:
@@ -763,11 +893,8 @@ if __name__ == "__main__":
     out_json = OUT_DIR / f"rapport_intersections_{timestamp}.json"
     out_html = OUT_DIR / f"rapport_intersections_{timestamp}.html"
     
-    with open(out_json, "w", encoding="utf-8") as f:
-        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    write_rapport_json(out_json, rapport)
 
-    html = generate_html(rapport)
-    with open(out_html, "w", encoding="utf-8") as f:
-        f.write(html)
+    write_rapport_html(out_html, rapport)
 
     logger.info(f"\n✅ Rapports exportés ({out_json}, {out_html})")
\ No newline at end of file
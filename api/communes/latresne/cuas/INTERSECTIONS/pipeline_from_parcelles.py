@@ -27,9 +27,12 @@ if str(_PROJECT_ROOT) not in sys.path:
 from api.communes.latresne.cuas.CERFA_ANALYSE.verification_unite_fonciere import verifier_unite_fonciere
 from api.communes.latresne.cuas.INTERSECTIONS.intersections import (
     CATALOGUE,
-    calculate_intersection,
+    calculate_intersections,
+    engine as intersections_engine,
     fetch_superficie_indicative,
     format_intersection_layer,
+    parcelle_area_sig,
+    write_rapport_json,
 )
 from api.communes.latresne.cuas.INTERSECTIONS.intersection_modules.enrichment import enrich_intersections_rapport
 from api.communes.latresne.cuas.CUA.sub_orchestrator_cua import generer_visualisations_et_cua_depuis_wkt
@@ -273,40 +276,15 @@ def run_pipeline_from_parcelles(
     # 3️⃣ Intersections
     # ============================================================
     logger.info("=== Analyse des intersections ===")
-    from sqlalchemy import create_engine, text
-
-    SUPABASE_HOST = os.getenv('SUPABASE_HOST')
-    SUPABASE_DB = os.getenv('SUPABASE_DB')
-    SUPABASE_USER = os.getenv('SUPABASE_USER')
-    SUPABASE_PASSWORD = os.getenv('SUPABASE_PASSWORD')
-    SUPABASE_PORT = str(os.getenv('SUPABASE_PORT') or "5432").strip().strip('"').strip("'")
-    if SUPABASE_HOST and "pooler.supabase.com" in SUPABASE_HOST and SUPABASE_PORT == "5432":
-        logger.warning("SUPABASE_PORT=5432 detecte sur pooler; bascule auto vers 6543 (transaction mode).")
-        SUPABASE_PORT = "6543"
-
-    DATABASE_URL = f"postgresql+psycopg2://{SUPABASE_USER}:{SUPABASE_PASSWORD}@{SUPABASE_HOST}:{SUPABASE_PORT}/{SUPABASE_DB}"
-    # Limiter drastiquement le nombre de connexions ouvertes en mode pooler Supabase.
-    # Ces scripts pipeline sont courts : un petit pool évite le "MaxClientsInSessionMode".
-    engine = create_engine(
-        DATABASE_URL,
-        pool_size=1,
-        max_overflow=0,
-        pool_pre_ping=True,
-        pool_recycle=1800,
-    )
+    # Pool du module intersections : un par processus (chaque job pipeline est un sous-processus),
+    # volontairement petit pour éviter le "MaxClientsInSessionMode" du pooler Supabase.
+    engine = intersections_engine
 
     with open(wkt_path, "r", encoding="utf-8") as f:
         parcelle_wkt = f.read()
 
     # Calcul de la surface SIG
-    with engine.connect() as conn:
-        area_parcelle_sig = float(conn.execute(
-            text("SELECT ST_Area(ST_GeomFromText(:wkt, 2154))"),
-            {"wkt": parcelle_wkt}
-        ).scalar())
-
-    # Relâcher explicitement le pool local dès que possible
-    engine.dispose()
+    area_parcelle_sig = parcelle_area_sig(parcelle_wkt)
 
     # Mise à jour de la surface dans le JSON CERFA (temporaire, sera remplacée par superficie indicative)
     cerfa_json["data"]["superficie_totale_m2"] = round(area_parcelle_sig, 2)
@@ -331,11 +309,12 @@ def run_pipeline_from_parcelles(
         "intersections": {}
     }
 
-    # Analyse pour chaque table du catalogue
+    # Analyse pour chaque table du catalogue (couches calculées en parallèle)
     n_tables = len(CATALOGUE)
+    resultats = calculate_intersections(parcelle_wkt, area_parcelle_sig)
     for i, (table, config) in enumerate(CATALOGUE.items()):
         logger.info(f"→ {table}")
-        objets, total_metric, metadata = calculate_intersection(parcelle_wkt, table, area_parcelle_sig)
+        objets, total_metric, metadata = resultats[table]
         layer = format_intersection_layer(config, objets, total_metric, area_parcelle_sig)
         if objets:
             logger.info(f"  ✅ {len(objets)} objet(s) | {layer['pct_sig']:.4f} %")
@@ -349,17 +328,13 @@ def run_pipeline_from_parcelles(
             gc.collect()
 
     enrich_intersections_rapport(rapport, parcelle_wkt, engine)
-    engine.dispose()
 
     log_memory("APRES_INTERSECTIONS")
 
     # Sauvegarde des rapports
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     intersections_json_path = OUT_DIR / f"rapport_intersections_{timestamp}.json"
-    intersections_json_path.write_text(
-        json.dumps(rapport, indent=2, ensure_ascii=False),
-        encoding="utf-8"
-    )
+    write_rapport_json(intersections_json_path, rapport)
     logger.info(f"✅ Rapports d'intersections exportés : {intersections_json_path}")
 
     # ============================================================
@@ -30,7 +30,7 @@ try:
 except ImportError:
     psutil = None
 from supabase import create_client
-from pyproj import Transformer
+from utils.geo import l93_to_wgs84
 from shapely import wkt as shapely_wkt
 
 from api.communes.latresne.cuas.CUA.map2d.carte2d.carte2d_rendu import generer_carte_2d_depuis_wkt
@@ -138,8 +138,7 @@ def compute_centroid_from_wkt_path(wkt_path: str):
             return None
 
         c = geom.centroid
-        transformer = Transformer.from_crs("EPSG:2154", "EPSG:4326", always_xy=True)
-        lon, lat = transformer.transform(c.x, c.y)
+        lon, lat = l93_to_wgs84().transform(c.x, c.y)
 
         centroid = {"lon": float(lon), "lat": float(lat)}
         logger.info(f"📍 Centroïde UF calculé: {centroid}")
@@ -151,17 +151,22 @@ def calculate_intersection(parcelle_wkt, table_name, area_parcelle_sig):
                 q = f"""
                     WITH p AS (
                         SELECT ST_MakeValid(ST_GeomFromText(:wkt, 2154)) AS g
+                    ),
+                    inter AS (
+                        SELECT
+                            {select_cols},
+                            ROUND(CAST(ST_Area(
+                                ST_Intersection(ST_MakeValid(t.geom_2154), p.g)
+                            ) AS numeric), 2) AS surface_inter_m2
+                        FROM {SCHEMA}.{table_name} t, p
+                        WHERE t.geom_2154 IS NOT NULL
+                          AND t.geom_2154 && p.g
+                          AND ST_Intersects(ST_MakeValid(t.geom_2154), p.g)
+                          AND ST_Area(ST_Intersection(ST_MakeValid(t.geom_2154), p.g))
+                              > {MIN_INTERSECTION_AREA_M2}
                     )
-                    SELECT
-                        {select_cols},
-                        ROUND(CAST(ST_Area(
-                            ST_Intersection(ST_MakeValid(t.geom_2154), p.g)
-                        ) AS numeric), 2) AS surface_inter_m2
-                    FROM {SCHEMA}.{table_name} t, p
-                    WHERE t.geom_2154 IS NOT NULL
-                      AND ST_Intersects(ST_MakeValid(t.geom_2154), p.g)
-                      AND ST_Area(ST_Intersection(ST_MakeValid(t.geom_2154), p.g))
-                          > {MIN_INTERSECTION_AREA_M2}
+                    SELECT *, SUM(surface_inter_m2) OVER () AS surface_totale_m2
+                    FROM inter
                 """
 
                 rs = conn.execute(text(q), {"wkt": parcelle_wkt})
@@ -171,14 +176,17 @@ def calculate_intersection(parcelle_wkt, table_name, area_parcelle_sig):
                 objects = []
                 total_surface = 0.0
 
-                for row in rows:
+                for i, row in enumerate(rows):
                     d = dict(zip(cols, row))
                     surf = float(d.get("surface_inter_m2", 0) or 0)
+                    # Total calculé côté SQL (fenêtre), identique sur chaque ligne
+                    total = d.pop("surface_totale_m2", None)
+                    if i == 0:
+                        total_surface = float(total or 0)
                     # Calculer pct_uf et supprimer la surface
                     pct_uf = round((surf / area_parcelle_sig * 100), 4) if area_parcelle_sig > 0 else 0
                     d["pct_uf"] = pct_uf
                     d.pop("surface_inter_m2", None)  # Retirer la surface
-                    total_surface += surf
                     objects.append(d)
 
                 # Conversions types non JSON
@@ -230,6 +238,7 @@ def calculate_intersection(parcelle_wkt, table_name, area_parcelle_sig):
                         {raw_inter_attrs}
                     FROM {SCHEMA}.{table_name} t, p
                     WHERE t.geom_2154 IS NOT NULL
+                      AND t.geom_2154 && p.g
                       AND ST_Intersects(ST_MakeValid(t.geom_2154), p.g)
                       AND ST_Area(ST_Intersection(ST_MakeValid(t.geom_2154), p.g))
                           > {MIN_INTERSECTION_AREA_M2}
@@ -13,15 +13,14 @@ def compute_centroid_from_wkt_l93(wkt_str: str | None) -> dict | None:
     if not wkt_str or not str(wkt_str).strip():
         return None
     try:
-        from pyproj import Transformer
         from shapely import wkt as shapely_wkt
+        from utils.geo import l93_to_wgs84
 
         geom = shapely_wkt.loads(str(wkt_str).strip())
         if geom.is_empty:
             return None
         c = geom.centroid
-        transformer = Transformer.from_crs("EPSG:2154", "EPSG:4326", always_xy=True)
-        lon, lat = transformer.transform(c.x, c.y)
+        lon, lat = l93_to_wgs84().transform(c.x, c.y)
         return {"lon": float(lon), "lat": float(lat)}
     except Exception as exc:
         logger.warning("Centroïde UF non calculé : %s", exc)
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import Response
 import requests
-import geopandas as gpd
-from shapely.geometry import Point
+from requests.adapters import HTTPAdapter
+from shapely.geometry import Point, shape
 import io
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
@@ -15,6 +15,10 @@ import html
 
 router = APIRouter()
 
+# Session partagée : keep-alive + reprise TLS vers data.geopf.fr et data.ademe.fr
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=3))
+
 
 def nettoyer_texte(texte):
     """Nettoie les problèmes d'encodage"""
@@ -52,20 +56,22 @@ def get_parcelle_geometry(code_insee: str, section: str, numero: str):
         "CQL_FILTER": f"code_insee='{code_insee}' AND section='{section}' AND numero='{numero}'"
     }
     
-    r = requests.get("https://data.geopf.fr/wfs/ows", params=params, timeout=15)
+    r = _SESSION.get("https://data.geopf.fr/wfs/ows", params=params, timeout=15)
     r.raise_for_status()
     
-    gdf = gpd.read_file(io.BytesIO(r.content))
-    if len(gdf) == 0:
+    # Une seule parcelle : lecture directe du GeoJSON, sans GeoDataFrame
+    features = r.json().get("features") or []
+    if not features:
         raise ValueError("Parcelle introuvable")
     
-    return gdf.iloc[0].geometry, gdf.iloc[0].get('contenance', 'N/A')
+    feature = features[0]
+    return shape(feature["geometry"]), (feature.get("properties") or {}).get('contenance', 'N/A')
 
 
 def fetch_dpe_commune(code_insee: str):
     """Récupère tous les DPE de la commune"""
     params = {'q': f'code_insee_ban:{code_insee}', 'size': 1000}
-    r = requests.get(
+    r = _SESSION.get(
         "https://data.ademe.fr/data-fair/api/v1/datasets/dpe03existant/lines",
         params=params, timeout=15
     )
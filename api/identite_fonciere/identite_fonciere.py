@@ -6,10 +6,11 @@ import os
 import re
 import json
 import requests
-import io
+from requests.adapters import HTTPAdapter
 import logging
 from contextlib import contextmanager
 from contextvars import ContextVar
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Iterator
 from dataclasses import dataclass
@@ -20,14 +21,24 @@ from dotenv import load_dotenv
 from ..ssl_utils import ssl_verify_for_requests
 
 try:
-    import geopandas as gpd
+    from shapely.geometry import shape
 except ImportError:
-    gpd = None
+    shape = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Session partagée pour l'IGN WFS : keep-alive + reprise TLS entre les appels
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=3))
+
 
 def _debug_identite_fonciere() -> bool:
     """Logs détaillés pour la phase de tests : IDENTITE_FONCIERE_DEBUG=1 ou true."""
@@ -294,6 +305,8 @@ def _elements_display_count(elements: List[Dict[str, Any]], config: Dict[str, An
 # Fonctions métier
 # ------------------------------------------------------------
 
+# Géométrie cadastrale stable : une requête IGN par parcelle et par processus (les erreurs ne sont pas mises en cache)
+@lru_cache(maxsize=1024)
 def fetch_parcelle_geometry_ign(section: str, numero: str, insee: str) -> str:
     """
     Récupère la géométrie WKT en EPSG:2154 depuis l'IGN WFS
@@ -307,14 +320,14 @@ def fetch_parcelle_geometry_ign(section: str, numero: str, insee: str) -> str:
         str: Géométrie au format WKT en EPSG:2154
     
     Raises:
-        ValueError: Si geopandas n'est pas disponible
+        ValueError: Si shapely n'est pas disponible
         requests.RequestException: Si erreur réseau
         ValueError: Si parcelle non trouvée
     """
     logger.info(f"🔍 Récupération géométrie IGN pour {section} {numero} (INSEE: {insee})")
     
-    if gpd is None:
-        raise ValueError("geopandas non disponible")
+    if shape is None:
+        raise ValueError("shapely non disponible")
     
     params = {
         "service": "WFS",
@@ -327,7 +340,7 @@ def fetch_parcelle_geometry_ign(section: str, numero: str, insee: str) -> str:
     }
     
     logger.info(f"📡 Appel IGN WFS...")
-    r = requests.get(
+    r = _SESSION.get(
         IGN_WFS_ENDPOINT,
         params=params,
         timeout=30,
@@ -336,13 +349,14 @@ def fetch_parcelle_geometry_ign(section: str, numero: str, insee: str) -> str:
     r.raise_for_status()
     logger.info(f"✅ Réponse IGN reçue ({len(r.content)} bytes)")
     
-    gdf = gpd.read_file(io.BytesIO(r.content))
-    
-    if gdf.empty:
+    # Une seule parcelle : lecture directe du GeoJSON (déjà en EPSG:2154), sans GeoDataFrame
+    features = _json_loads(r.content).get("features") or []
+    if not features:
         raise ValueError(f"Parcelle {section} {numero} non trouvée (INSEE: {insee})")
     
-    logger.info(f"✅ Géométrie extraite : {len(gdf.iloc[0].geometry.wkt)} caractères")
-    return gdf.iloc[0].geometry.wkt
+    wkt = shape(features[0]["geometry"]).wkt
+    logger.info(f"✅ Géométrie extraite : {len(wkt)} caractères")
+    return wkt
 
 def get_carto_tables() -> List[str]:
     """
@@ -10,9 +10,11 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict, List, Optional
 
-from pyproj import Transformer
+import numpy as np
+import shapely
 from shapely.geometry import shape
-from shapely.ops import transform as shp_transform
+
+from utils.geo import get_transformer
 
 from .identite_fonciere import _detect_input_srid
 
@@ -37,8 +39,8 @@ def geojson_centroid_wgs84(
         if det == 4326:
             c = g.centroid
             return {"lon": float(c.x), "lat": float(c.y)}
-        tf = Transformer.from_crs(f"EPSG:{det}", "EPSG:4326", always_xy=True)
-        g4326 = shp_transform(lambda x, y, z=None: tf.transform(x, y), g)
+        tf = get_transformer(f"EPSG:{det}", "EPSG:4326")
+        g4326 = shapely.transform(g, lambda xy: np.column_stack(tf.transform(xy[:, 0], xy[:, 1])))
         c = g4326.centroid
         return {"lon": float(c.x), "lat": float(c.y)}
     except Exception as exc:
@@ -9,13 +9,15 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from xml.sax.saxutils import escape as xml_escape
 
-from pyproj import Transformer
+import numpy as np
+import shapely
 from reportlab.lib import colors
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import cm
 from reportlab.platypus import HRFlowable, Image, Paragraph, Spacer, Table, TableStyle
 from shapely.geometry import shape
-from shapely.ops import transform
+
+from utils.geo import get_transformer
 
 from .plu_zonage_rapport import ZONAGE_PAGE_LAYER_KEYS, zone_key_from_intersection_element
 
@@ -104,8 +106,9 @@ def compute_uf_surface_m2(
         detected = _detect_input_srid(geometry, srid)
         if detected == 2154:
             return round(float(g.area), 2)
-        tf = Transformer.from_crs(f"EPSG:{detected}", "EPSG:2154", always_xy=True)
-        g2154 = transform(lambda x, y, z=None: tf.transform(x, y), g)
+        tf = get_transformer(f"EPSG:{detected}", "EPSG:2154")
+        # Tous les sommets en un seul appel PROJ vectorisé (pas de callback par anneau)
+        g2154 = shapely.transform(g, lambda xy: np.column_stack(tf.transform(xy[:, 0], xy[:, 1])))
         return round(float(g2154.area), 2)
     except Exception:
         return None
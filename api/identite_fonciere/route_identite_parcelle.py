@@ -4,6 +4,7 @@ Endpoint API pour l'identité parcellaire et l'identité foncière (UF) :
 intersections, carte Folium, rapport PDF, et proxy des fichiers carte/PDF stockés
 sur Supabase (liens « propres » sans domaine supabase dans le PDF).
 """
+import asyncio
 import logging
 import os
 import re
@@ -12,11 +13,18 @@ import time
 
 import requests
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
-from fastapi.responses import StreamingResponse, FileResponse, HTMLResponse
+from starlette.background import BackgroundTask
+from fastapi.responses import StreamingResponse, FileResponse, HTMLResponse, JSONResponse
 from pydantic import BaseModel, ConfigDict, Field, AliasChoices, field_validator, model_validator
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+try:
+    import orjson  # noqa: F401 — requis par ORJSONResponse au rendu
+    from fastapi.responses import ORJSONResponse as _IdentiteJSONResponse
+except ImportError:  # pragma: no cover - orjson optionnel
+    _IdentiteJSONResponse = JSONResponse
+
 from .identite_fonciere import (
     get_catalogue,
     analyser_identite_fonciere,
@@ -26,7 +34,7 @@ from .identite_fonciere import (
     resolve_identite_fonciere_geometry,
 )
 from .carte_identite_fonciere import generate_identite_fonciere_map_html
-from .sse_identite_fonciere import iter_identite_fonciere_sse_chunks, sse_error_chunk
+from .sse_identite_fonciere import aiter_identite_fonciere_sse_chunks, sse_error_chunk
 from .pdf.rapport_identite_fonciere import generate_rapport_pdf
 from . import identite_fonciere_history as identite_fonciere_history_module
 from services.auth.current_user import get_current_user_id
@@ -38,8 +46,17 @@ from .storage_et_urls import (
     upload_pdf_rapport,
 )
 
-router = APIRouter(prefix="/api/identite-parcelle", tags=["Identité Parcellaire"])
-router_fonciere = APIRouter(prefix="/api/identite-fonciere", tags=["Identité Foncière"])
+# orjson : listes d'intersections (attributs + surfaces) sérialisées bien plus vite que json stdlib
+router = APIRouter(
+    prefix="/api/identite-parcelle",
+    tags=["Identité Parcellaire"],
+    default_response_class=_IdentiteJSONResponse,
+)
+router_fonciere = APIRouter(
+    prefix="/api/identite-fonciere",
+    tags=["Identité Foncière"],
+    default_response_class=_IdentiteJSONResponse,
+)
 
 _logger = logging.getLogger(__name__)
 
@@ -492,15 +509,17 @@ async def intersect_fonciere_stream(payload: IdentiteFonciereRequest):
     # Générateur **async** : évite `iterate_in_threadpool` (sync iterator) où chaque `next()`
     # peut s'exécuter dans un thread différent → ContextVar / reset token cassés et
     # `get_identite_db_schema()` incohérent entre les couches (ex. Argelès vs latresne).
+    # Le travail bloquant (WFS IGN, PostGIS) tourne dans un thread unique qui hérite du contexte.
     async def agen():
         with identite_fonciere_request_context(payload.db_schema):
             try:
-                geom = resolve_identite_fonciere_geometry(
+                geom = await asyncio.to_thread(
+                    resolve_identite_fonciere_geometry,
                     payload.geometry,
                     idu=payload.idu,
                     parcelle_id=payload.parcelle_id,
                 )
-                for chunk in iter_identite_fonciere_sse_chunks(
+                async for chunk in aiter_identite_fonciere_sse_chunks(
                     geom,
                     payload.commune,
                     payload.insee,
@@ -571,6 +590,11 @@ async def view_map_fonciere_html(token: str):
     return HTMLResponse(content=html)
 
 
+# Proxy Storage : connexions keep-alive réutilisées, relais en streaming
+_STORAGE_SESSION = requests.Session()
+_PROXY_CHUNK = 64 * 1024
+
+
 @router_fonciere.get("/public/if/{project_id}/{filename}")
 def proxy_identite_fonciere_depuis_storage(project_id: str, filename: str) -> Response:
     """
@@ -591,13 +615,14 @@ def proxy_identite_fonciere_depuis_storage(project_id: str, filename: str) -> Re
     src = public_object_url(path)
 
     try:
-        r = requests.get(src, timeout=90)
+        r = _STORAGE_SESSION.get(src, timeout=90, stream=True)
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=f"Stockage indisponible: {e!s}") from e
 
-    if r.status_code == 404:
-        raise HTTPException(status_code=404, detail="Fichier introuvable.")
     if r.status_code != 200:
+        r.close()
+        if r.status_code == 404:
+            raise HTTPException(status_code=404, detail="Fichier introuvable.")
         raise HTTPException(status_code=502, detail=f"Erreur stockage ({r.status_code}).")
 
     ct = r.headers.get("content-type", "").split(";")[0].strip()
@@ -608,13 +633,19 @@ def proxy_identite_fonciere_depuis_storage(project_id: str, filename: str) -> Re
     else:
         media = ct or "application/octet-stream"
 
-    return Response(
-        content=r.content,
+    headers = {
+        "Cache-Control": "public, max-age=300",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if r.headers.get("content-length") and not r.headers.get("content-encoding"):
+        headers["Content-Length"] = r.headers["content-length"]
+
+    # Relais par blocs : le fichier n'est jamais entièrement chargé en mémoire
+    return StreamingResponse(
+        r.iter_content(chunk_size=_PROXY_CHUNK),
         media_type=media,
-        headers={
-            "Cache-Control": "public, max-age=300",
-            "X-Content-Type-Options": "nosniff",
-        },
+        headers=headers,
+        background=BackgroundTask(r.close),
     )
 
 
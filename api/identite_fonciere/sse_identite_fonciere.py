@@ -1,11 +1,28 @@
 """
 Formatage SSE pour l’identité foncière (progression couche par couche).
 """
+import asyncio
 import json
-from typing import Any, Dict, Iterator, Optional
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 
 from .identite_fonciere import iter_identite_fonciere_sse_events
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson optionnel
+    orjson = None
+
+
+def _sse_data(payload: Dict[str, Any]) -> str:
+    """Ligne SSE `data: …` ; orjson (UTF-8 natif) si dispo, sinon json stdlib."""
+    if orjson is not None:
+        try:
+            return "data: " + orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode() + "\n\n"
+        except TypeError:  # type non géré par orjson → repli stdlib
+            pass
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
 
 def iter_identite_fonciere_sse_chunks(
     geometry: Dict[str, Any],
@@ -15,7 +32,74 @@ def iter_identite_fonciere_sse_chunks(
 ) -> Iterator[str]:
     """Yield des lignes `data: {...}\\n\\n` pour `StreamingResponse`."""
     for ev in iter_identite_fonciere_sse_events(geometry, commune, insee, srid):
-        yield f"data: {json.dumps(ev, ensure_ascii=False)}\n\n"
+        yield _sse_data(ev)
+
+
+# Fenêtre de regroupement : les `layer_done` émis en rafale (couches vides / ignorées)
+# partent dans une seule écriture au lieu d'un envoi + flush par couche.
+SSE_COALESCE_WINDOW_SEC = 0.005
+
+_END = object()
+
+
+async def aiter_identite_fonciere_sse_chunks(
+    geometry: Dict[str, Any],
+    commune: str,
+    insee: Optional[str],
+    srid: Optional[int],
+    window: float = SSE_COALESCE_WINDOW_SEC,
+) -> AsyncIterator[str]:
+    """
+    Variante async de `iter_identite_fonciere_sse_chunks` pour `StreamingResponse`.
+
+    Le générateur synchrone (requêtes PostGIS couche par couche) est consommé en entier
+    dans **un seul** thread (`asyncio.to_thread` copie le contexte → ContextVar du schéma
+    conservé), et les événements arrivés dans la même fenêtre sont concaténés.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def _produce() -> None:
+        try:
+            for chunk in iter_identite_fonciere_sse_chunks(geometry, commune, insee, srid):
+                if stop.is_set():
+                    return
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except BaseException as e:  # remonté côté consommateur
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+
+    # Référence conservée : la tâche ne doit pas être collectée avant la fin du thread
+    producer = asyncio.ensure_future(asyncio.to_thread(_produce))
+    try:
+        done = False
+        while not done:
+            item = await queue.get()
+            batch = []
+            deadline = loop.time() + window
+            while True:
+                if item is _END:
+                    done = True
+                    break
+                if isinstance(item, BaseException):
+                    if batch:
+                        yield "".join(batch)
+                    raise item
+                batch.append(item)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if batch:
+                yield "".join(batch)
+    finally:
+        # Client déconnecté : le thread s'arrête après la couche en cours
+        stop.set()
 
 
 def sse_error_chunk(message: str) -> str:
@@ -24,4 +108,4 @@ def sse_error_chunk(message: str) -> str:
         "success": False,
         "error": message,
     }
-    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    return _sse_data(payload)
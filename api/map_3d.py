@@ -10,7 +10,6 @@ Compatibilité :
 """
 
 import os
-import io
 import tempfile
 import requests
 import geopandas as gpd
@@ -139,13 +138,19 @@ def fetch_parcelle_wfs(code_insee, id_parcelle):
 
     r = requests.get(ENDPOINT, params=params)
     r.raise_for_status()
-    gdf = gpd.read_file(io.BytesIO(r.content))
-
-    if gdf.empty:
+    payload = r.json()
+    features = payload.get("features") or []
+    if not features:
         raise ValueError(f"❌ Parcelle {id_parcelle} introuvable dans la commune {code_insee}")
 
-    if gdf.crs is None or gdf.crs.to_string() != SRS:
-        gdf = gdf.to_crs(SRS)
+    # srsName=EPSG:2154 → coordonnées déjà en Lambert-93 : on déclare le CRS sans
+    # reprojeter. Reprojection seulement si le serveur annonce un autre CRS.
+    crs_name = ((payload.get("crs") or {}).get("properties") or {}).get("name") or ""
+    gdf = gpd.GeoDataFrame.from_features(features)
+    if not crs_name or crs_name.endswith("2154"):
+        gdf = gdf.set_crs(SRS, allow_override=True)
+    else:
+        gdf = gdf.set_crs(crs_name).to_crs(SRS)
 
     return gdf
 
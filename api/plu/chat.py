@@ -1,4 +1,5 @@
 # backend/routes/chat.py
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import PyPDF2
@@ -32,15 +33,8 @@ class ChatPLURequest(BaseModel):
 @router.post("/chat")
 async def chat_with_plu(request: ChatPLURequest):
     try:
-        # 1. Récupérer le code PLU
-        plu_code = get_plu_code(request.insee)["code"]
-        pdf_path = f"reglements/{plu_code}/{request.zone}.pdf"
-        
-        # 2. Télécharger depuis Supabase Storage
-        pdf_bytes = supabase.storage.from_("plu-reglements-cached").download(pdf_path)
-        
-        # 3. Extraire le texte
-        pdf_text = extract_text_from_pdf(pdf_bytes)
+        # 1-3. Code PLU, PDF Supabase, extraction texte (bloquants → thread, la boucle reste libre)
+        pdf_text = await asyncio.to_thread(load_reglement_text, request.insee, request.zone)
         
         # 4. Construire le contexte avec historique
         history_text = ""
@@ -70,7 +64,8 @@ INSTRUCTIONS :
 {history_text}"""
         
         # 6. Appel GPT-5 Nano
-        answer = call_gpt_5(
+        answer = await asyncio.to_thread(
+            call_gpt_5,
             model="gpt-5-nano",
             system_prompt=system_prompt,
             user_prompt=request.question,
@@ -88,6 +83,19 @@ INSTRUCTIONS :
         raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
 
 
+def load_reglement_text(insee: str, zone: str) -> str:
+    """Règlement de zone (texte) depuis le cache Supabase Storage."""
+    # 1. Récupérer le code PLU
+    plu_code = get_plu_code(insee)["code"]
+    pdf_path = f"reglements/{plu_code}/{zone}.pdf"
+
+    # 2. Télécharger depuis Supabase Storage
+    pdf_bytes = supabase.storage.from_("plu-reglements-cached").download(pdf_path)
+
+    # 3. Extraire le texte
+    return extract_text_from_pdf(pdf_bytes)
+
+
 def extract_text_from_pdf(pdf_bytes: bytes) -> str:
     """Extrait le texte d'un PDF"""
     pdf_file = BytesIO(pdf_bytes)
@@ -13,6 +13,7 @@ import os
 import pathlib
 import tempfile
 import time
+from functools import lru_cache
 
 import requests
 from google import genai
@@ -36,6 +37,7 @@ PRIX_OUT = 1.50
 logger = logging.getLogger("raa_analyse")
 
 
+@lru_cache(maxsize=1)
 def get_client() -> genai.Client:
     if GEMINI_API_KEY:
         return genai.Client(vertexai=True, api_key=GEMINI_API_KEY)
@@ -30,6 +30,7 @@ from pydantic import BaseModel, Field
 
 from services.auth.commune_access import assert_authorized_for_commune_slug
 from services.auth.current_user import get_current_user_id
+from utils.pg_dsn import database_dsn, uses_pgbouncer
 
 Kind = Literal["text", "longtext", "bool", "date", "int", "json"]
 WriteRole = Literal["superadmin"]
@@ -204,34 +205,12 @@ def _list_admin_catalog_summaries() -> list[dict]:
 _pool: Optional[asyncpg.Pool] = None
 
 
-def _database_dsn() -> str:
-    dsn = (os.environ.get("DATABASE_URL") or "").strip()
-    if dsn:
-        return dsn.replace("postgresql+psycopg2://", "postgresql://").replace(
-            "postgresql+psycopg://", "postgresql://"
-        )
-    host = (os.getenv("SUPABASE_HOST") or "").strip().strip('"').strip("'")
-    db = (os.getenv("SUPABASE_DB") or "").strip().strip('"').strip("'")
-    user = (os.getenv("SUPABASE_USER") or "").strip().strip('"').strip("'")
-    password = (os.getenv("SUPABASE_PASSWORD") or "").strip().strip('"').strip("'")
-    port = (os.getenv("SUPABASE_PORT") or "5432").strip().strip('"').strip("'")
-    if host and "pooler.supabase.com" in host and port == "5432":
-        port = "6543"
-    if not all([host, db, user, password]):
-        raise RuntimeError("DATABASE_URL ou variables SUPABASE_* requises")
-    return f"postgresql://{user}:{password}@{host}:{port}/{db}"
-
-
-def _uses_pgbouncer(dsn: str) -> bool:
-    return "pooler.supabase.com" in dsn or ":6543" in dsn
-
-
 async def get_pool() -> asyncpg.Pool:
     global _pool
     if _pool is None:
-        dsn = _database_dsn()
+        dsn = database_dsn()
         pool_kwargs: dict[str, Any] = {"min_size": 1, "max_size": 5}
-        if _uses_pgbouncer(dsn):
+        if uses_pgbouncer(dsn):
             pool_kwargs["statement_cache_size"] = 0
         _pool = await asyncpg.create_pool(dsn, **pool_kwargs)
     return _pool
@@ -9,6 +9,7 @@ from datetime import datetime
 from pathlib import Path
 
 from app.state import JOBS
+from services.history.centroid_history import invalidate_history_cache
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
@@ -131,6 +132,9 @@ async def run_pipeline_from_parcelles_async(
         JOBS[job_id]["returncode"] = returncode
         JOBS[job_id]["end_time"] = datetime.now().isoformat()
 
+        # Le sous-processus a pu insérer une pipeline : la carte doit la voir sans attendre le TTL
+        invalidate_history_cache()
+
         if returncode == 0:
             JOBS[job_id]["status"] = "success"
             JOBS[job_id]["current_step"] = "done"
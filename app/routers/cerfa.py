@@ -1,13 +1,58 @@
 """Analyse préliminaire CERFA (PDF) — extraction LLM pour validation UI."""
 
+import asyncio
+import os
+import shutil
 import uuid
 from pathlib import Path
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # noqa: F401 — requis par ORJSONResponse au rendu
+    from fastapi.responses import ORJSONResponse as _CerfaJSONResponse
+except ImportError:  # pragma: no cover - orjson optionnel
+    _CerfaJSONResponse = JSONResponse
 
 from services.analyse_cerfa_mistral.GEMINI.orchestrator import analyser_cerfa_complet
 
-router = APIRouter(prefix="/cerfa", tags=["cerfa"])
+router = APIRouter(prefix="/cerfa", tags=["cerfa"], default_response_class=_CerfaJSONResponse)
+
+_COPY_CHUNK = 1 << 20
+
+# Analyses simultanées max (rendu PDF → images + appels Gemini) ; au-delà, file d'attente
+# bornée dans le temps puis 503, pour ne pas empiler CPU et PDF temporaires dans /tmp.
+CERFA_MAX_CONCURRENT = int(os.getenv("CERFA_MAX_CONCURRENT", str(os.cpu_count() or 2)))
+CERFA_QUEUE_TIMEOUT_SEC = float(os.getenv("CERFA_QUEUE_TIMEOUT_SEC", "30"))
+_ANALYSE_SEM = asyncio.Semaphore(CERFA_MAX_CONCURRENT)
+
+# PDF temporaire écrit puis relu aussitôt : tmpfs (RAM) si dispo, sinon /tmp.
+# tmpfs est borné (64 Mo par défaut sous Docker) → repli disque si le PDF n'y tient pas.
+_SHM_DIR = Path("/dev/shm")
+CERFA_SCRATCH_DIR = Path(
+    os.getenv("CERFA_SCRATCH") or (_SHM_DIR if os.access(_SHM_DIR, os.W_OK) else "/tmp")
+)
+CERFA_SCRATCH_MAX_BYTES = int(os.getenv("CERFA_SCRATCH_MAX_BYTES", str(32 * 1024 * 1024)))
+_TMP_DIR = Path("/tmp")
+
+
+def _scratch_path(job_id: str, size: int | None) -> Path:
+    base = CERFA_SCRATCH_DIR
+    if base != _TMP_DIR:
+        try:
+            too_big = size is None or size > CERFA_SCRATCH_MAX_BYTES
+            if too_big or shutil.disk_usage(base).free < 2 * size:
+                base = _TMP_DIR
+        except OSError:
+            base = _TMP_DIR
+    return base / f"cerfa_{job_id}.pdf"
+
+
+def _save_upload(upload: UploadFile, dest: Path) -> None:
+    upload.file.seek(0)
+    with open(dest, "wb", buffering=_COPY_CHUNK) as f:
+        shutil.copyfileobj(upload.file, f, _COPY_CHUNK)
 
 
 @router.post("/analyse")
@@ -20,23 +65,37 @@ async def analyse_cerfa_endpoint(
     Analyse préliminaire d'un CERFA (LLM / Gemini).
     Retourne les informations extraites pour validation UI.
     """
+    try:
+        await asyncio.wait_for(_ANALYSE_SEM.acquire(), timeout=CERFA_QUEUE_TIMEOUT_SEC)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Trop d'analyses CERFA en cours, réessayez dans quelques instants",
+            headers={"Retry-After": "10"},
+        )
+
     job_id = str(uuid.uuid4())
-    temp_pdf = Path(f"/tmp/cerfa_{job_id}.pdf")
+    temp_pdf = None
 
     try:
-        with open(temp_pdf, "wb") as f:
-            f.write(await pdf.read())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur écriture PDF temporaire: {e}")
+        try:
+            temp_pdf = _scratch_path(job_id, pdf.size)
+            # Copie par blocs de 1 Mo du spool Starlette vers le scratch (pas de PDF entier en mémoire)
+            await asyncio.to_thread(_save_upload, pdf, temp_pdf)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erreur écriture PDF temporaire: {e}")
 
-    try:
-        result = analyser_cerfa_complet(str(temp_pdf))
-        return {
-            "job_id": job_id,
-            **result,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        try:
+            # Extraction LLM bloquante (plusieurs secondes) : hors de la boucle d'événements
+            result = await asyncio.to_thread(analyser_cerfa_complet, str(temp_pdf))
+            return {
+                "job_id": job_id,
+                **result,
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
     finally:
-        if temp_pdf.exists():
-            temp_pdf.unlink()
+        # PDF temporaire supprimé dans tous les cas (y compris écriture partielle)
+        if temp_pdf is not None:
+            temp_pdf.unlink(missing_ok=True)
+        _ANALYSE_SEM.release()
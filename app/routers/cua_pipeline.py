@@ -17,9 +17,9 @@ from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from api.communes.latresne.cuas.CERFA_ANALYSE.auth_utils import get_user_insee_list
 from app.pipeline_jobs import run_pipeline_from_parcelles_async
 from app.state import JOBS
+from services.history.db import fetch_authorized_insee_codes
 
 router = APIRouter(tags=["cua-pipeline"])
 
@@ -70,7 +70,7 @@ async def analyze_parcelles(req: ParcelleRequest):
         "user_email": req.user_email,
     }
 
-    user_insee_list = get_user_insee_list(req.user_id) if req.user_id else []
+    user_insee_list = (await fetch_authorized_insee_codes(req.user_id) or []) if req.user_id else []
     print(f"👤 Droits utilisateur {req.user_email}: {user_insee_list or 'toutes communes'}")
 
     if user_insee_list and req.code_insee and req.code_insee not in user_insee_list:
@@ -135,7 +135,7 @@ async def analyze_parcelles_with_json_data(req: ParcelleWithCerfaDataRequest):
         "user_email": req.user_email,
     }
 
-    user_insee_list = get_user_insee_list(req.user_id) if req.user_id else []
+    user_insee_list = (await fetch_authorized_insee_codes(req.user_id) or []) if req.user_id else []
     print(f"👤 Droits utilisateur {req.user_email}: {user_insee_list or 'toutes communes'}")
 
     if user_insee_list and req.code_insee and req.code_insee not in user_insee_list:
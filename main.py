@@ -16,6 +16,7 @@ import requests
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy import create_engine, text
 
@@ -54,6 +55,7 @@ from services.ingestion_cadastre.router_etl_commune import router as etl_commune
 from services.ingestion_mnt_lidar.router_ingestion_mnt_lidar import router as ingestion_mnt_lidar_router
 from app.deps import supabase
 from app.routers.cerfa import router as cerfa_router
+from services.analyse_cerfa_mistral.GEMINI.orchestrator import precharger_clients as precharger_clients_cerfa
 from app.routers.cua_pipeline import router as cua_pipeline_router
 from api.cuas.argeles.catalogue_routes import router as cua_catalogue_router
 from api.cuas.argeles.cua_router import router as cua_generate_router
@@ -65,6 +67,7 @@ from services.history.centroid_history import router as centroid_history_router
 import services.history.centroid_history as centroid_history_module
 from services.history.suivi import router as suivi_router
 import services.history.suivi as suivi_module
+from services.history.db import close_history_pool, get_history_pool
 from services.history.project_management import router as project_management_router
 import services.history.project_management as project_management_module
 from services.history.project_directory import router as project_directory_router
@@ -274,6 +277,26 @@ async def log_supabase_db_diagnostics():
         engine.dispose()
 
 
+@app.on_event("startup")
+def preload_cerfa_clients():
+    """Clients Gemini de l'analyse CERFA construits une fois, hors du chemin de la 1re requête."""
+    try:
+        precharger_clients_cerfa()
+    except Exception as e:
+        logging.getLogger("startup.cerfa").warning("Préchargement clients CERFA impossible: %s", e)
+
+
+@app.on_event("startup")
+async def open_history_db_pool():
+    """Ouvre le pool asyncpg des lectures d'historique (by_user, map-history, suivi)."""
+    await get_history_pool()
+
+
+@app.on_event("shutdown")
+async def close_history_db_pool():
+    await close_history_pool()
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -286,8 +309,10 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Center-X", "X-Center-Y", "X-N-Points"],
+    expose_headers=["X-Center-X", "X-Center-Y", "X-N-Points", "ETag"],
 )
+# Réponses JSON volumineuses (cerfa_data de l'historique) : ratio gzip ~5-10x
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # --- Back-office / admin ---
 app.include_router(admin_router)
@@ -12,11 +12,12 @@ import time
 from pathlib import Path
 from typing import Optional, Dict
 
-from google import genai
 from google.genai import types
 from pdf2image import convert_from_path
 from dotenv import load_dotenv
 
+from utils.llm_clients import get_gemini_client
+
 load_dotenv()
 
 logger = logging.getLogger("cerfa.extractor.info")
@@ -107,11 +108,15 @@ RÈGLES :
 
 Retourne UNIQUEMENT le JSON."""
 
+    # Rendu une seule fois : préfixe octet-identique en tête de chaque requête
+    # (cache implicite Gemini du préfixe → tokens facturés au tarif « cached »)
+    PROMPT_RENDU = PROMPT.format(visual_hints=VISUAL_HINTS)
+
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY requise")
-        self._client = genai.Client(api_key=self.api_key)
+        self._client = get_gemini_client(self.api_key)
 
     def _pdf_to_images(self, pdf_path: str, pages: list = None, dpi: int = 150):
         """Convertit PDF en images PIL"""
@@ -196,8 +201,7 @@ Retourne UNIQUEMENT le JSON."""
             images     = self._pdf_to_images(pdf_path, pages)
             image_parts = self._pil_to_parts(images)
 
-            prompt   = self.PROMPT.format(visual_hints=self.VISUAL_HINTS)
-            contents = [prompt] + image_parts
+            contents = [self.PROMPT_RENDU] + image_parts
 
             try:
                 response = self._client.models.generate_content(
@@ -222,6 +226,7 @@ Retourne UNIQUEMENT le JSON."""
                     "prompt_tokens":     getattr(usage, "prompt_token_count",     0),
                     "completion_tokens": getattr(usage, "candidates_token_count", 0),
                     "total_tokens":      getattr(usage, "total_token_count",      0),
+                    "cached_tokens":     getattr(usage, "cached_content_token_count", 0) or 0,
                     "cost_input_usd":    cost_input,
                     "cost_output_usd":   cost_output,
                     "cost_total_usd":    cost_input + cost_output,
@@ -12,9 +12,10 @@ from pathlib import Path
 from dotenv import load_dotenv
 from pdf2image import convert_from_path
 
-from google import genai
 from google.genai import types
 
+from utils.llm_clients import get_gemini_client
+
 load_dotenv()
 
 PDF_PATH = Path(
@@ -95,7 +96,8 @@ def extraire_parcelles_depuis_pdf(pdf_path: str, model: str = MODEL) -> dict:
     images      = pdf_pages_to_pil_images(pdf, PAGES, dpi=DPI)
     image_parts = pil_to_parts(images)
 
-    client   = genai.Client(api_key=API_KEY)
+    client   = get_gemini_client(API_KEY)
+    # Prompt fixe en tête, images ensuite : le préfixe commun profite du cache implicite Gemini
     contents = [PROMPT] + image_parts
 
     try:
@@ -139,6 +141,7 @@ def extraire_parcelles_depuis_pdf(pdf_path: str, model: str = MODEL) -> dict:
         "somme_surfaces": somme,
         "ecart_total":    abs(somme - total) if total else None,
         "tokens":         getattr(usage, "total_token_count", 0) if usage else 0,
+        "cached_tokens":  (getattr(usage, "cached_content_token_count", 0) or 0) if usage else 0,
     }
 
     return {"success": True, "data": data, "stats": stats}
@@ -14,28 +14,47 @@ avant toute génération de certificat d’urbanisme.
 """
 
 import logging
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from utils.llm_clients import get_gemini_client
+
 from .extraire_infos import extraire_info_cerfa
 from .extraire_parcelles import extraire_parcelles_depuis_pdf
 
 logger = logging.getLogger("cerfa.orchestrator")
 
 
+def precharger_clients() -> None:
+    """
+    Instancie au démarrage de l'API le client Gemini (mis en cache, partagé par les deux
+    extracteurs), pour que la première analyse CERFA ne paie pas sa construction.
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        logger.warning("GEMINI_API_KEY absente : préchargement des clients CERFA ignoré")
+        return
+    get_gemini_client(api_key)
+
+
 def analyser_cerfa_complet(pdf_path: str) -> dict:
     """
     Orchestrateur principal :
-    - appelle l'extracteur d'infos générales
-    - appelle l'extracteur de parcelles
+    - appelle l'extracteur d'infos générales et l'extracteur de parcelles (en parallèle)
     - agrège les résultats + quelques stats (dont tokens)
     """
 
     t_start = time.time()
 
-    # 1) Infos générales (pages 1–4)
+    # 1) + 2) Infos générales et parcelles : appels Gemini indépendants, lancés en parallèle
     logger.info("🚀 Début analyse CERFA complète", extra={"pdf_path": pdf_path})
-    info_result = extraire_info_cerfa(pdf_path)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fut_info = pool.submit(extraire_info_cerfa, pdf_path)
+        fut_parcelles = pool.submit(extraire_parcelles_depuis_pdf, pdf_path)
+        info_result = fut_info.result()
+        parcelles_result = fut_parcelles.result()
 
     if not info_result.get("success"):
         logger.error("Échec extraction infos générales", extra={"error": info_result.get("error")})
@@ -49,9 +68,7 @@ def analyser_cerfa_complet(pdf_path: str) -> dict:
     info_usage = info_result.get("usage", {})
     info_tokens = info_usage.get("total_tokens", 0)
 
-    # 2) Parcelles cadastrales (pages 2 et 4 via pipeline simple)
-    parcelles_result = extraire_parcelles_depuis_pdf(pdf_path)
-
+    # Parcelles cadastrales (pages 2 et 4 via pipeline simple)
     if not parcelles_result.get("success"):
         logger.error("Échec extraction parcelles", extra={"error": parcelles_result.get("error")})
         return {
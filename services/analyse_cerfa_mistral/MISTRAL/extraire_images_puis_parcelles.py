@@ -10,13 +10,14 @@ Pipeline simple :
 """
 
 import os
-import base64
 import json
 from pathlib import Path
 
 from dotenv import load_dotenv
 from pdf2image import convert_from_path
-from mistralai import Mistral
+
+from utils.fast_base64 import b64encode
+from utils.llm_clients import get_mistral_client
 
 load_dotenv()
 
@@ -89,7 +90,7 @@ def pdf_pages_to_images_b64(pdf_path: Path, pages, dpi: int = 300):
         img.save(out_path, "PNG")
 
         with open(out_path, "rb") as f:
-            b64 = base64.b64encode(f.read()).decode("utf-8")
+            b64 = b64encode(f.read()).decode("utf-8")
 
         images_b64.append(b64)
         print(f"✅ Page {page_num} extraite → {out_path}")
@@ -131,7 +132,7 @@ def extraire_parcelles_depuis_pdf(pdf_path: str, model: str = MODEL) -> dict:
     images_b64 = pdf_pages_to_images_b64(pdf, PAGES, dpi=DPI)
 
     # 2) Appel Mistral
-    client = Mistral(api_key=API_KEY)
+    client = get_mistral_client(API_KEY)
 
     content = [{"type": "text", "text": PROMPT}]
     for b64 in images_b64:
@@ -4,15 +4,17 @@ Toutes infos sauf parcelles (module séparé)
 """
 
 import os
-import base64
 import json
 import re
 import logging
 import time
 from pathlib import Path
 from typing import Optional, Dict
-from mistralai import Mistral
 from pdf2image import convert_from_path
+
+from utils.fast_base64 import b64encode
+from utils.llm_clients import get_mistral_client
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -109,7 +111,7 @@ Retourne UNIQUEMENT le JSON."""
         self.api_key = api_key or os.getenv("MISTRAL_API_KEY")
         if not self.api_key:
             raise ValueError("MISTRAL_API_KEY requise")
-        self.client = Mistral(api_key=self.api_key)
+        self.client = get_mistral_client(self.api_key)
     
     def _pdf_to_images(self, pdf_path: str, pages: list = None, dpi: int = 250) -> list:
         """Convertit PDF en images base64"""
@@ -124,7 +126,7 @@ Retourne UNIQUEMENT le JSON."""
             imgs[0].save(tmp, "PNG")
             
             with open(tmp, "rb") as f:
-                images_b64.append(base64.b64encode(f.read()).decode())
+                images_b64.append(b64encode(f.read()).decode())
             os.remove(tmp)
         
         return images_b64
@@ -5,29 +5,42 @@
 Audit des limites Mistral Vision avec différents DPI
 """
 
+import io
 import os
-import base64
+import sys
 import json
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
 from dotenv import load_dotenv
 from pdf2image import convert_from_path
 from PIL import Image
 from mistralai import Mistral
 
-load_dotenv()
+# Racine du projet dans le path (script lancé directement) pour les helpers utils/
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'mistral_vision_audit_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
-        logging.StreamHandler()
-    ]
-)
+from utils.fast_base64 import b64encode
+
+# Encodeur JPEG libjpeg-turbo (PyTurboJPEG) si installé, sinon Pillow
+try:
+    from turbojpeg import TJPF_GRAY, TJPF_RGB, TJSAMP_GRAY, TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+# Sérialisation JSON rapide (orjson) si installé
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rien de coûteux à l'import : les workers (spawn) ré-importent ce module.
+# Logging, .env et TurboJPEG sont initialisés dans main() / à la demande.
 logger = logging.getLogger(__name__)
 
 # -------------------------------------------------------------------
@@ -41,7 +54,12 @@ PDF_PATH = Path(
 
 PAGES = [2, 4]
 MODEL = "mistral-small-2506"  # Modèle vision de Mistral
-API_KEY = os.getenv("MISTRAL_API_KEY")
+
+# "upload" : images envoyées via l'API Files (URL signée) ; "base64" : data URI inline
+IMAGE_TRANSPORT = "upload"
+
+# Rendu en niveaux de gris (CERFA monochrome : ~2x moins d'octets, même signal OCR)
+GRAYSCALE = True
 
 # Test avec différents DPI
 DPI_TESTS = [100, 150, 200, 250, 300]
@@ -53,55 +71,184 @@ PROMPT = "Décris brièvement ce que tu vois sur ces images."
 # HELPERS
 # -------------------------------------------------------------------
 
-def pdf_pages_to_images_b64(pdf_path: Path, pages, dpi: int = 150, max_width: int = 2000):
-    """Extrait et optimise les pages."""
-    images_b64 = []
-    total_size = 0
+@lru_cache(maxsize=1)
+def _get_turbojpeg():
+    """Encodeur TurboJPEG du process courant (une init par worker), None si indisponible."""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError):
+        return None
+
+
+def _encode_page(img: Image.Image, max_width: int):
+    """Redimensionne et encode une page en JPEG."""
+    # Redimensionner si trop large
+    original_size = img.size
+    if img.width > max_width:
+        ratio = max_width / img.width
+        new_size = (max_width, int(img.height * ratio))
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
 
-    for page_num in pages:
-        imgs = convert_from_path(
-            str(pdf_path),
-            dpi=dpi,
-            first_page=page_num,
-            last_page=page_num,
+    # JPEG directement en mémoire (libjpeg-turbo SIMD si dispo, sinon Pillow optimisé)
+    _turbojpeg = _get_turbojpeg()
+    if _turbojpeg is not None and img.mode == "L":
+        jpeg = _turbojpeg.encode(
+            np.asarray(img)[..., None], quality=85,
+            pixel_format=TJPF_GRAY, jpeg_subsample=TJSAMP_GRAY,
         )
-        img = imgs[0]
-        
-        # Redimensionner si trop large
-        original_size = img.size
-        if img.width > max_width:
-            ratio = max_width / img.width
-            new_size = (max_width, int(img.height * ratio))
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
-        
-        # Sauver en JPEG optimisé
-        out_path = Path(f"temp_page_{page_num}_dpi{dpi}.jpg")
-        img.save(out_path, "JPEG", quality=85, optimize=True)
-        
-        file_size = out_path.stat().st_size
-        total_size += file_size
+    elif _turbojpeg is not None:
+        jpeg = _turbojpeg.encode(np.asarray(img.convert("RGB")), quality=85, pixel_format=TJPF_RGB)
+    else:
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85, optimize=True)
+        jpeg = buf.getvalue()
+
+    return jpeg, original_size, img.size, img.mode
+
+
+def _contiguous_runs(pages):
+    """Plages (first, last) de pages consécutives : [2, 3, 4, 7] → [(2, 4), (7, 7)]."""
+    runs = []
+    for page_num in sorted(set(pages)):
+        if runs and page_num == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], page_num)
+        else:
+            runs.append((page_num, page_num))
+    return runs
+
+
+def _render_run(run, pdf_path: str, dpi: int, max_width: int):
+    """Rasterise une plage de pages (un seul pdftoppm) puis l'encode en JPEG (process worker)."""
+    first, last = run
+    imgs = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=first,
+        last_page=last,
+        grayscale=GRAYSCALE,
+    )
+    return [(first + i, _encode_page(img, max_width)) for i, img in enumerate(imgs)]
+
+
+def pdf_pages_to_jpeg(pdf_path: Path, pages, dpi: int = 150, max_width: int = 2000):
+    """
+    Extrait et optimise les pages en JPEG.
+
+    Un appel pdftoppm par plage de pages consécutives (une seule analyse du PDF
+    pour [2, 3, 4]), sans rendre les pages non demandées ; les plages sont
+    traitées en parallèle et seuls les octets JPEG reviennent au process
+    principal (ordre de `pages` conservé).
+    """
+    runs = _contiguous_runs(pages)
+    render = partial(_render_run, pdf_path=str(pdf_path), dpi=dpi, max_width=max_width)
+    with ProcessPoolExecutor(max_workers=len(runs)) as ex:
+        by_page = dict(item for rendered in ex.map(render, runs) for item in rendered)
+    results = [by_page[page_num] for page_num in pages]
+
+    jpegs = []
+    total_size = 0
+    log_pages = logger.isEnabledFor(logging.INFO)
+    for page_num, (jpeg, original_size, size, mode) in zip(pages, results):
+        jpegs.append(jpeg)
+        total_size += len(jpeg)
+
+        if log_pages:
+            logger.info(
+                f"  Page {page_num}: {original_size[0]}x{original_size[1]}px → "
+                f"{size[0]}x{size[1]}px {mode} | "
+                f"Fichier: {len(jpeg)/1024:.1f}KB"
+            )
 
-        with open(out_path, "rb") as f:
-            b64 = base64.b64encode(f.read()).decode("utf-8")
+    logger.info(f"  📦 Taille totale: {total_size/1024:.1f}KB")
+    return jpegs, total_size
 
+
+def pdf_pages_to_images_b64(pdf_path: Path, pages, dpi: int = 150, max_width: int = 2000):
+    """Extrait et optimise les pages, encodées en base64."""
+    jpegs, total_size = pdf_pages_to_jpeg(pdf_path, pages, dpi=dpi, max_width=max_width)
+
+    images_b64 = []
+    base64_chars_total = 0
+    for jpeg in jpegs:
+        b64 = b64encode(jpeg).decode("ascii")
         images_b64.append(b64)
-        
-        logger.info(
-            f"  Page {page_num}: {original_size[0]}x{original_size[1]}px → "
-            f"{img.size[0]}x{img.size[1]}px | "
-            f"Fichier: {file_size/1024:.1f}KB | "
-            f"Base64: {len(b64):,} chars"
-        )
-        
-        # Nettoyage
-        out_path.unlink()
+        base64_chars_total += len(b64)
 
-    logger.info(f"  📦 Taille totale: {total_size/1024:.1f}KB | Base64 total: {sum(len(b) for b in images_b64):,} chars")
+    logger.info(f"  🔤 Base64 total: {base64_chars_total:,} chars")
     return images_b64, total_size
 
 
-def test_dpi(dpi: int):
-    """Test un appel Mistral Vision avec un DPI donné."""
+# Fichiers uploadés par (page, dpi) : {clé: (file_id, URL signée)}, supprimés en fin de run
+_uploads = {}
+
+
+def upload_image(client: Mistral, content: bytes, file_name: str, cache_key=None) -> str:
+    """Upload une image via l'API Files de Mistral et retourne son URL signée (réutilisée si cache_key connue)."""
+    if cache_key is not None and cache_key in _uploads:
+        return _uploads[cache_key][1]
+
+    uploaded = client.files.upload(
+        file={"file_name": file_name, "content": content},
+        purpose="ocr",
+    )
+    url = client.files.get_signed_url(file_id=uploaded.id).url
+    _uploads[cache_key if cache_key is not None else uploaded.id] = (uploaded.id, url)
+    return url
+
+
+def delete_uploads(client: Mistral) -> None:
+    """Supprime les fichiers uploadés (pages CERFA = données personnelles)."""
+    for file_id, _ in _uploads.values():
+        try:
+            client.files.delete(file_id=file_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Suppression du fichier {file_id} impossible: {e}")
+    _uploads.clear()
+
+
+def append_jsonl(path, record: dict) -> None:
+    """Ajoute un résultat (une ligne JSON) au fichier : rien n'est perdu si le run est interrompu."""
+    if orjson is not None:
+        line = orjson.dumps(record) + b"\n"
+    else:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(line)
+
+
+def bisect_max(values, probe, record=None, retries: int = 1):
+    """
+    Plus grande valeur de `values` (triées, succès monotone) pour laquelle `probe` réussit.
+
+    Recherche dichotomique : O(log N) appels au lieu d'un balayage linéaire.
+    `probe(v)` retourne (succès, résultat). Un échec est retesté `retries` fois
+    avant d'être retenu (hystérésis contre les erreurs transitoires) ; seul le
+    résultat de la dernière tentative est passé à `record`.
+    Retourne None si aucune valeur ne passe.
+    """
+    lo, hi = 0, len(values) - 1
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        ok, result = probe(values[mid])
+        for _ in range(retries):
+            if ok:
+                break
+            ok, result = probe(values[mid])
+        if record is not None:
+            record(result)
+        if ok:
+            best = values[mid]
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return best
+
+
+def test_dpi(dpi: int, client: Mistral):
+    """Test un appel Mistral Vision avec un DPI donné (client partagé entre les tests)."""
     logger.info("=" * 80)
     logger.info(f"🔍 TEST DPI = {dpi}")
     logger.info("=" * 80)
@@ -109,28 +256,37 @@ def test_dpi(dpi: int):
     try:
         # 1) Extraction images
         logger.info(f"📄 Extraction des pages {PAGES} à {dpi} DPI...")
-        images_b64, total_size = pdf_pages_to_images_b64(PDF_PATH, PAGES, dpi=dpi)
+        if IMAGE_TRANSPORT == "upload":
+            jpegs, total_size = pdf_pages_to_jpeg(PDF_PATH, PAGES, dpi=dpi)
+            image_urls = [
+                upload_image(client, jpeg, f"page_{page_num}_dpi{dpi}.jpg", cache_key=(page_num, dpi))
+                for page_num, jpeg in zip(PAGES, jpegs)
+            ]
+            base64_chars = 0
+        else:
+            images_b64, total_size = pdf_pages_to_images_b64(PDF_PATH, PAGES, dpi=dpi)
+            image_urls = [f"data:image/jpeg;base64,{b64}" for b64 in images_b64]
+            base64_chars = sum(len(b) for b in images_b64)
         
         # 2) Préparation du contenu
         content = [{"type": "text", "text": PROMPT}]
-        for idx, b64 in enumerate(images_b64):
+        for url in image_urls:
             content.append({
                 "type": "image_url",
-                "image_url": f"data:image/jpeg;base64,{b64}",
+                "image_url": url,
             })
         
         # 3) Appel API
-        client = Mistral(api_key=API_KEY)
         logger.info(f"📤 Envoi à {MODEL}...")
         
-        start_time = datetime.now()
+        t0 = time.perf_counter_ns()
         response = client.chat.complete(
             model=MODEL,
             messages=[{"role": "user", "content": content}],
             max_tokens=500,
             temperature=0.0,
         )
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = (time.perf_counter_ns() - t0) / 1e9
         
         # 4) Analyse de la réponse
         usage = response.usage
@@ -149,7 +305,7 @@ def test_dpi(dpi: int):
             "success": True,
             "dpi": dpi,
             "file_size_kb": total_size / 1024,
-            "base64_chars": sum(len(b) for b in images_b64),
+            "base64_chars": base64_chars,
             "prompt_tokens": usage.prompt_tokens,
             "completion_tokens": usage.completion_tokens,
             "total_tokens": usage.total_tokens,
@@ -183,27 +339,52 @@ def test_dpi(dpi: int):
 # -------------------------------------------------------------------
 
 def main():
-    print(f"API key: {API_KEY}")
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(f'mistral_vision_audit_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+            logging.StreamHandler()
+        ]
+    )
+    api_key = os.getenv("MISTRAL_API_KEY")
+
     logger.info("🚀 Audit Mistral Vision - Tests DPI")
     logger.info(f"📄 PDF: {PDF_PATH.name}")
     logger.info(f"📋 Pages: {PAGES}")
     logger.info(f"🤖 Modèle: {MODEL}")
     logger.info("")
     
-    if not API_KEY:
+    if not api_key:
         logger.error("❌ MISTRAL_API_KEY manquante")
         return
+    # Clé masquée : stdout et log du run sont conservés
+    logger.info(f"🔑 API key: …{api_key[-4:]}")
     
     if not PDF_PATH.exists():
         logger.error(f"❌ PDF introuvable: {PDF_PATH}")
         return
     
+    client = Mistral(api_key=api_key)
     results = []
+    output_file = f"audit_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
     
-    for dpi in DPI_TESTS:
-        result = test_dpi(dpi)
-        results.append(result)
+    def probe_dpi(dpi: int):
+        result = test_dpi(dpi, client)
         logger.info("")
+        return result["success"], result
+    
+    def record(result: dict) -> None:
+        results.append(result)
+        append_jsonl(output_file, result)
+    
+    # Seuil d'échec par dichotomie sur DPI_TESTS (succès supposé monotone en DPI)
+    try:
+        max_dpi = bisect_max(DPI_TESTS, probe_dpi, record)
+    finally:
+        delete_uploads(client)
+    results.sort(key=lambda r: r["dpi"])
     
     # Résumé
     logger.info("=" * 80)
@@ -228,12 +409,10 @@ def main():
                 f"❌ {r['error_type']}"
             )
     
+    logger.info("-" * 80)
+    logger.info(f"🎯 DPI max accepté: {max_dpi if max_dpi is not None else 'aucun'}")
     logger.info("=" * 80)
     
-    # Sauvegarde JSON
-    output_file = f"audit_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
     logger.info(f"💾 Résultats sauvegardés: {output_file}")
 
 
@@ -1,6 +1,7 @@
 import os
 import json
 import logging
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 from mistralai import Mistral
@@ -69,14 +70,15 @@ def audit_mistral_call():
         # Appel API avec mesure du temps
         start_time = datetime.now()
         logger.info(f"⏱️  Début de l'appel: {start_time}")
+        t0 = time.perf_counter_ns()
         
         response = client.chat.complete(
             model=model,
             messages=messages
         )
         
+        duration = (time.perf_counter_ns() - t0) / 1e9
         end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
         logger.info(f"⏱️  Fin de l'appel: {end_time}")
         logger.info(f"⏱️  Durée: {duration:.2f}s")
         
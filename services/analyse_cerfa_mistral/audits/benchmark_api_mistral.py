@@ -10,17 +10,33 @@ Test progressif pour identifier :
 - Payload max par requête
 """
 
+import io
 import os
+import sys
+import json
 import time
-import base64
+import asyncio
 import logging
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from typing import List, Optional
+import httpx
 from dotenv import load_dotenv
 from mistralai import Mistral
 from pdf2image import convert_from_path
 
+# Racine du projet dans le path (script lancé directement) pour les helpers utils/
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from utils.fast_base64 import b64encode
+
+# Sérialisation JSON rapide (orjson) si installé
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
 logging.basicConfig(
@@ -47,6 +63,12 @@ MODEL = "ministral-8b-2512"
 
 PROMPT_BASE = "Décris brièvement cette image du formulaire CERFA."
 
+# Rendu des pages PDF en niveaux de gris (CERFA monochrome : PNG ~3x plus léger)
+GRAYSCALE = True
+
+# "upload" : images envoyées via l'API Files (URL signée) ; "base64" : data URI inline
+IMAGE_TRANSPORT = "upload"
+
 # ============================================================
 # DATACLASSES
 # ============================================================
@@ -74,20 +96,112 @@ class TestResult:
 def b64_image(path: str) -> str:
     """Encode image en base64"""
     with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+        return b64encode(f.read()).decode("ascii")
+
+
+@lru_cache(maxsize=16)
+def pdf_pages_to_png(pdf_path: str, first_page: int, last_page: int, dpi: int = 250) -> tuple:
+    """Convertit une plage de pages PDF en PNG (un seul appel pdftoppm), mémoïsé par (pdf, plage, dpi)"""
+    images = convert_from_path(
+        pdf_path, dpi=dpi, first_page=first_page, last_page=last_page, grayscale=GRAYSCALE,
+    )
+    pngs = []
+    for img in images:
+        buf = io.BytesIO()
+        img.save(buf, "PNG")
+        pngs.append(buf.getvalue())
+    return tuple(pngs)
+
+
+@lru_cache(maxsize=16)
+def pdf_pages_to_b64(pdf_path: str, first_page: int, last_page: int, dpi: int = 250) -> tuple:
+    """Convertit une plage de pages PDF en base64, mémoïsé par (pdf, plage, dpi)"""
+    return tuple(
+        b64encode(png).decode("ascii")
+        for png in pdf_pages_to_png(pdf_path, first_page, last_page, dpi)
+    )
+
+
+# Fichiers déjà uploadés, par clé (chemin image ou (pdf, page, dpi)) : {clé: (file_id, URL signée)}
+_uploads = {}
+
+
+def upload_image(client: Mistral, content: bytes, file_name: str, cache_key=None) -> str:
+    """Upload une image via l'API Files et retourne son URL signée (réutilisée si cache_key connue)"""
+    if cache_key is not None and cache_key in _uploads:
+        return _uploads[cache_key][1]
+
+    uploaded = client.files.upload(
+        file={"file_name": file_name, "content": content},
+        purpose="ocr",
+    )
+    url = client.files.get_signed_url(file_id=uploaded.id).url
+    _uploads[cache_key if cache_key is not None else uploaded.id] = (uploaded.id, url)
+    return url
+
+
+def delete_uploads(client: Mistral) -> None:
+    """Supprime les fichiers uploadés en fin de run (pages CERFA = données personnelles)"""
+    for file_id, _ in _uploads.values():
+        try:
+            client.files.delete(file_id=file_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Suppression du fichier {file_id} impossible: {e}")
+    _uploads.clear()
+
+
+def build_http_client() -> httpx.Client:
+    """Client HTTP partagé : pool keep-alive (HTTP/2 si h2 est installé) pour les bursts"""
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+
+    return httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=32),
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+
+
+def append_jsonl(path, record: dict) -> None:
+    """Ajoute un résultat (une ligne JSON) au fichier : rien n'est perdu si le run est interrompu."""
+    if orjson is not None:
+        line = orjson.dumps(record) + b"\n"
+    else:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(line)
 
 
-def pdf_page_to_b64(pdf_path: str, page: int, dpi: int = 250) -> str:
-    """Convertit une page PDF en base64"""
-    images = convert_from_path(pdf_path, dpi=dpi, first_page=page, last_page=page)
-    tmp = f"/tmp/bench_page_{page}.png"
-    images[0].save(tmp, "PNG")
-    
-    with open(tmp, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    
-    os.remove(tmp)
-    return b64
+def bisect_max(values, probe, record=None, retries: int = 1):
+    """
+    Plus grande valeur de `values` (triées, succès monotone) pour laquelle `probe` réussit.
+
+    Recherche dichotomique : O(log N) appels au lieu d'un balayage linéaire.
+    `probe(v)` retourne (succès, résultat). Un échec est retesté `retries` fois
+    avant d'être retenu (hystérésis contre les erreurs transitoires) ; seul le
+    résultat de la dernière tentative est passé à `record`.
+    Retourne None si aucune valeur ne passe.
+    """
+    lo, hi = 0, len(values) - 1
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        ok, result = probe(values[mid])
+        for _ in range(retries):
+            if ok:
+                break
+            ok, result = probe(values[mid])
+        if record is not None:
+            record(result)
+        if ok:
+            best = values[mid]
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return best
 
 
 def is_rate_limited(error: Exception) -> bool:
@@ -97,15 +211,110 @@ def is_rate_limited(error: Exception) -> bool:
             "too many requests" in s)
 
 
-def calculate_payload_size(images_b64: List[str]) -> float:
-    """Calcule taille payload en MB"""
-    return sum(len(img) for img in images_b64) / (1024 * 1024)
+def calculate_payload_size(images: List) -> float:
+    """Calcule taille payload en MB (base64 ou bytes bruts uploadés)"""
+    return sum(len(img) for img in images) / (1024 * 1024)
 
 
 # ============================================================
 # TESTS
 # ============================================================
 
+def prepare_content(client: Mistral, nb_images: int, dpi: int, source: str):
+    """
+    Prépare le contenu du message (prompt + images)
+    
+    Pour source="image", l'image n'est envoyée qu'une fois avec la consigne
+    de la considérer comme N copies ; payload_mb compte tout de même N images.
+    
+    Returns:
+        (content, payload_mb) : parts du message et payload comptabilisé en MB
+    """
+    images = []
+    image_urls = []
+    prompt = PROMPT_BASE
+    
+    if IMAGE_TRANSPORT == "upload":
+        if source == "image":
+            # Même image : un seul upload, réutilisé entre tests et bursts
+            with open(IMAGE_PATH, "rb") as f:
+                raw = f.read()
+            url = upload_image(client, raw, Path(IMAGE_PATH).name, cache_key=IMAGE_PATH)
+            images = [raw]
+            image_urls = [url]
+        else:
+            # Pages différentes du PDF (max 4), rendues en un seul appel
+            last_page = min(nb_images, 4)
+            for page, raw in enumerate(pdf_pages_to_png(PDF_PATH, 1, last_page, dpi), start=1):
+                images.append(raw)
+                image_urls.append(upload_image(
+                    client, raw, f"page_{page}_{dpi}dpi.png",
+                    cache_key=(PDF_PATH, page, dpi),
+                ))
+    else:
+        if source == "image":
+            images = [b64_image(IMAGE_PATH)]
+        else:
+            # Pages différentes du PDF (max 4), rendues en un seul appel
+            images = list(pdf_pages_to_b64(PDF_PATH, 1, min(nb_images, 4), dpi))
+        image_urls = [f"data:image/png;base64,{img_b64}" for img_b64 in images]
+    
+    if source == "image":
+        payload_mb = calculate_payload_size(images) * nb_images
+        if nb_images > 1:
+            prompt = f"{PROMPT_BASE} Considère que cette image est fournie en {nb_images} exemplaires identiques."
+    else:
+        payload_mb = calculate_payload_size(images)
+    
+    # Construction message
+    content = [{"type": "text", "text": prompt}]
+    for url in image_urls:
+        content.append({
+            "type": "image_url",
+            "image_url": url
+        })
+    
+    return content, payload_mb
+
+
+def _success_result(test_name: str, nb_images: int, dpi: int, response, duration: float, payload_mb: float) -> TestResult:
+    """Construit le résultat d'un appel réussi"""
+    usage = response.usage
+    logger.info(f"   ✅ {usage.total_tokens} tokens | {payload_mb:.2f} MB | {duration:.2f}s")
+    
+    return TestResult(
+        test_name=test_name,
+        success=True,
+        nb_images=nb_images,
+        dpi=dpi,
+        prompt_tokens=usage.prompt_tokens,
+        completion_tokens=usage.completion_tokens,
+        total_tokens=usage.total_tokens,
+        duration_s=duration,
+        payload_mb=payload_mb,
+    )
+
+
+def _error_result(test_name: str, nb_images: int, dpi: int, error: Exception, payload_mb: float) -> TestResult:
+    """Construit le résultat d'un appel en échec"""
+    is_rl = is_rate_limited(error)
+    logger.error(f"   ❌ {'Rate limited' if is_rl else type(error).__name__}")
+    
+    return TestResult(
+        test_name=test_name,
+        success=False,
+        nb_images=nb_images,
+        dpi=dpi,
+        prompt_tokens=0,
+        completion_tokens=0,
+        total_tokens=0,
+        duration_s=0,
+        payload_mb=payload_mb,
+        error=str(error)[:200],
+        is_rate_limited=is_rl,
+    )
+
+
 def test_single_request(
     client: Mistral,
     nb_images: int,
@@ -119,84 +328,75 @@ def test_single_request(
         client: Client Mistral
         nb_images: Nombre d'images à envoyer
         dpi: Résolution
-        source: "image" (répéter même image) ou "pdf" (pages différentes)
+        source: "image" (même image, envoyée une fois) ou "pdf" (pages différentes)
     """
     test_name = f"{nb_images}img_{dpi}dpi_{source}"
     logger.info(f"🧪 Test: {test_name}")
+    payload_mb = 0
     
     try:
-        # Préparation images
-        images_b64 = []
-        
-        if source == "image":
-            # Répéter la même image
-            img = b64_image(IMAGE_PATH)
-            images_b64 = [img] * nb_images
-        else:
-            # Pages différentes du PDF
-            for page in range(1, min(nb_images + 1, 5)):  # Max 4 pages
-                images_b64.append(pdf_page_to_b64(PDF_PATH, page, dpi))
-        
-        payload_mb = calculate_payload_size(images_b64)
-        
-        # Construction message
-        content = [{"type": "text", "text": PROMPT_BASE}]
-        for img_b64 in images_b64:
-            content.append({
-                "type": "image_url",
-                "image_url": f"data:image/png;base64,{img_b64}"
-            })
+        content, payload_mb = prepare_content(client, nb_images, dpi, source)
         
         # Appel API
-        t_start = time.time()
+        t_start = time.perf_counter_ns()
         response = client.chat.complete(
             model=MODEL,
             messages=[{"role": "user", "content": content}],
             temperature=0.0,
             max_tokens=500,
         )
-        duration = time.time() - t_start
+        duration = (time.perf_counter_ns() - t_start) / 1e9
         
-        usage = response.usage
+        return _success_result(test_name, nb_images, dpi, response, duration, payload_mb)
         
-        result = TestResult(
-            test_name=test_name,
-            success=True,
-            nb_images=nb_images,
-            dpi=dpi,
-            prompt_tokens=usage.prompt_tokens,
-            completion_tokens=usage.completion_tokens,
-            total_tokens=usage.total_tokens,
-            duration_s=duration,
-            payload_mb=payload_mb,
-        )
+    except Exception as e:
+        return _error_result(test_name, nb_images, dpi, e, payload_mb)
+
+
+async def test_single_request_async(
+    client: Mistral,
+    semaphore: asyncio.Semaphore,
+    nb_images: int,
+    dpi: int,
+    source: str = "image",
+) -> TestResult:
+    """Variante async de test_single_request (requêtes réellement concurrentes)"""
+    test_name = f"{nb_images}img_{dpi}dpi_{source}"
+    payload_mb = 0
+    
+    try:
+        content, payload_mb = prepare_content(client, nb_images, dpi, source)
         
-        logger.info(f"   ✅ {usage.total_tokens} tokens | {payload_mb:.2f} MB | {duration:.2f}s")
-        return result
+        async with semaphore:
+            t_start = time.perf_counter_ns()
+            response = await client.chat.complete_async(
+                model=MODEL,
+                messages=[{"role": "user", "content": content}],
+                temperature=0.0,
+                max_tokens=500,
+            )
+            duration = (time.perf_counter_ns() - t_start) / 1e9
         
-    except Exception as e:
-        is_rl = is_rate_limited(e)
-        logger.error(f"   ❌ {'Rate limited' if is_rl else type(e).__name__}")
+        return _success_result(test_name, nb_images, dpi, response, duration, payload_mb)
         
-        return TestResult(
-            test_name=test_name,
-            success=False,
-            nb_images=nb_images,
-            dpi=dpi,
-            prompt_tokens=0,
-            completion_tokens=0,
-            total_tokens=0,
-            duration_s=0,
-            payload_mb=calculate_payload_size(images_b64) if images_b64 else 0,
-            error=str(e)[:200],
-            is_rate_limited=is_rl,
-        )
+    except Exception as e:
+        return _error_result(test_name, nb_images, dpi, e, payload_mb)
+
+
+async def _burst(client: Mistral, nb_requests: int, max_concurrency: int) -> List[TestResult]:
+    """Lance N requêtes en vol simultanément (asyncio.gather, ordre conservé)"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*[
+        test_single_request_async(client, semaphore, nb_images=1, dpi=250, source="image")
+        for _ in range(nb_requests)
+    ])
 
 
 def test_burst_requests(
     client: Mistral,
     nb_requests: int,
     spacing_s: float = 0.0,
+    max_concurrency: Optional[int] = None,
 ) -> List[TestResult]:
     """
     Test de N requêtes successives
@@ -204,23 +404,33 @@ def test_burst_requests(
     Args:
         client: Client Mistral
         nb_requests: Nombre de requêtes
-        spacing_s: Délai entre requêtes (0 = burst)
+        spacing_s: Délai entre requêtes (0 = burst concurrent via asyncio.gather)
+        max_concurrency: Plafond de requêtes simultanées en burst (défaut: nb_requests)
     """
     logger.info(f"\n🔥 Burst test: {nb_requests} requêtes (spacing={spacing_s}s)")
     
-    results = []
-    for i in range(nb_requests):
-        logger.info(f"   Requête {i+1}/{nb_requests}")
-        
-        result = test_single_request(client, nb_images=1, dpi=250, source="image")
-        results.append(result)
+    if spacing_s <= 0:
+        # Prépare (et uploade) l'image une fois avant de lancer les requêtes en parallèle
+        prepare_content(client, nb_images=1, dpi=250, source="image")
+        results = asyncio.run(_burst(client, nb_requests, max_concurrency or nb_requests))
         
-        if not result.success and result.is_rate_limited:
-            logger.warning(f"   ⚠️ Rate limited à la requête {i+1}")
-            break
-        
-        if i < nb_requests - 1 and spacing_s > 0:
-            time.sleep(spacing_s)
+        rate_limited = [i + 1 for i, r in enumerate(results) if r.is_rate_limited]
+        if rate_limited:
+            logger.warning(f"   ⚠️ Rate limited aux requêtes {rate_limited}")
+    else:
+        results = []
+        for i in range(nb_requests):
+            logger.info(f"   Requête {i+1}/{nb_requests}")
+            
+            result = test_single_request(client, nb_images=1, dpi=250, source="image")
+            results.append(result)
+            
+            if not result.success and result.is_rate_limited:
+                logger.warning(f"   ⚠️ Rate limited à la requête {i+1}")
+                break
+            
+            if i < nb_requests - 1:
+                time.sleep(spacing_s)
     
     success_count = sum(1 for r in results if r.success)
     logger.info(f"   Succès: {success_count}/{len(results)}")
@@ -232,40 +442,24 @@ def test_burst_requests(
 # BENCHMARK PRINCIPAL
 # ============================================================
 
-def run_benchmark():
-    """Execute tous les tests"""
-    
-    api_key = os.getenv("MISTRAL_API_KEY")
-    if not api_key:
-        raise ValueError("MISTRAL_API_KEY manquante")
-
-    print(f"API key: {api_key}")
-    
-    if not Path(IMAGE_PATH).exists():
-        raise FileNotFoundError(f"Image test introuvable: {IMAGE_PATH}")
-    
-    client = Mistral(api_key=api_key)
-    all_results = []
-    
-    print("\n" + "="*70)
-    print("🎯 BENCHMARK MISTRAL API - RATE LIMITS")
-    print("="*70)
-    
+def _run_tests(client: Mistral, record) -> None:
+    """Enchaîne les tests 1 à 4 ; chaque résultat est transmis à `record`"""
     # ============================================================
     # TEST 1: Progression du nombre d'images (DPI fixe)
     # ============================================================
-    print("\n📊 TEST 1: Impact du nombre d'images (250 DPI)")
+    print("\n📊 TEST 1: Impact du nombre d'images (250 DPI, pages distinctes du PDF)")
     print("-"*70)
     
-    for nb_img in [1, 2, 4, 6, 8]:
-        result = test_single_request(client, nb_img, dpi=250, source="image")
-        all_results.append(result)
-        
-        if not result.success and result.is_rate_limited:
-            logger.warning(f"⚠️ Limite atteinte à {nb_img} images")
-            break
-        
+    def probe_images(nb_img: int):
+        # Pages différentes : N images réellement envoyées (source="image" n'en envoie qu'une)
+        result = test_single_request(client, nb_img, dpi=250, source="pdf")
         time.sleep(2)  # Pause entre tests
+        return result.success, result
+    
+    # Seuil par dichotomie (succès supposé monotone en nombre d'images ; PDF limité à 4 pages)
+    max_images = bisect_max([1, 2, 3, 4], probe_images, record)
+    if max_images != 4:
+        logger.warning(f"⚠️ Limite atteinte au-delà de {max_images} images")
     
     # ============================================================
     # TEST 2: Impact de la résolution DPI (images fixes)
@@ -273,15 +467,14 @@ def run_benchmark():
     print("\n📊 TEST 2: Impact de la résolution DPI (4 images)")
     print("-"*70)
     
-    for dpi in [150, 200, 250, 300, 350]:
+    def probe_dpi(dpi: int):
         result = test_single_request(client, nb_images=4, dpi=dpi, source="pdf")
-        all_results.append(result)
-        
-        if not result.success and result.is_rate_limited:
-            logger.warning(f"⚠️ Limite atteinte à {dpi} DPI")
-            break
-        
         time.sleep(2)
+        return result.success, result
+    
+    max_dpi = bisect_max([150, 200, 250, 300, 350], probe_dpi, record)
+    if max_dpi != 350:
+        logger.warning(f"⚠️ Limite atteinte au-delà de {max_dpi} DPI")
     
     # ============================================================
     # TEST 3: Burst - requêtes successives sans délai
@@ -290,7 +483,7 @@ def run_benchmark():
     print("-"*70)
     
     burst_results = test_burst_requests(client, nb_requests=5, spacing_s=0)
-    all_results.extend(burst_results)
+    record(*burst_results)
     
     time.sleep(5)  # Pause avant test suivant
     
@@ -301,7 +494,44 @@ def run_benchmark():
     print("-"*70)
     
     spaced_results = test_burst_requests(client, nb_requests=5, spacing_s=3)
-    all_results.extend(spaced_results)
+    record(*spaced_results)
+
+
+def run_benchmark():
+    """Execute tous les tests"""
+    
+    api_key = os.getenv("MISTRAL_API_KEY")
+    if not api_key:
+        raise ValueError("MISTRAL_API_KEY manquante")
+
+    # Clé masquée : la sortie du benchmark est souvent capturée dans un log
+    print(f"API key: …{api_key[-4:]}")
+    
+    if not Path(IMAGE_PATH).exists():
+        raise FileNotFoundError(f"Image test introuvable: {IMAGE_PATH}")
+    
+    http_client = build_http_client()
+    client = Mistral(api_key=api_key, client=http_client)
+    all_results = []
+    
+    # Résultats écrits au fil de l'eau (JSONL), un test par ligne
+    results_jsonl = Path("benchmark_results.jsonl")
+    results_jsonl.unlink(missing_ok=True)
+    
+    def record(*results: TestResult) -> None:
+        for r in results:
+            all_results.append(r)
+            append_jsonl(results_jsonl, asdict(r))
+    
+    print("\n" + "="*70)
+    print("🎯 BENCHMARK MISTRAL API - RATE LIMITS")
+    print("="*70)
+    
+    # Images uploadées supprimées même si un test plante (pages CERFA = données personnelles)
+    try:
+        _run_tests(client, record)
+    finally:
+        delete_uploads(client)
     
     # ============================================================
     # ANALYSE DES RÉSULTATS
@@ -356,8 +586,7 @@ def run_benchmark():
     
     print("\n" + "="*70)
     
-    # Sauvegarde résultats
-    import json
+    # Sauvegarde résultats (récapitulatif ; le détail est déjà dans benchmark_results.jsonl)
     output = {
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
         "model": MODEL,
@@ -376,10 +605,13 @@ def run_benchmark():
         ]
     }
     
-    with open("benchmark_results.json", "w") as f:
-        json.dump(output, f, indent=2)
+    if orjson is not None:
+        Path("benchmark_results.json").write_bytes(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+    else:
+        with open("benchmark_results.json", "w") as f:
+            json.dump(output, f, indent=2)
     
-    print("💾 Résultats sauvegardés: benchmark_results.json\n")
+    print("💾 Résultats sauvegardés: benchmark_results.json (+ benchmark_results.jsonl)\n")
 
 
 # ============================================================
@@ -10,6 +10,12 @@ import json
 import logging
 from pathlib import Path
 
+# Sérialisation JSON rapide (orjson) si installé
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Ajouter le chemin racine du projet pour les imports de package
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
@@ -27,6 +33,16 @@ logging.basicConfig(
 
 logger = logging.getLogger("test.orchestrator")
 
+BANNER = "=" * 70
+
+
+def write_json(path: Path, data: dict) -> None:
+    """Écrit `data` en JSON indenté (bytes UTF-8 directs via orjson si dispo)."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
 # ============================================================
 # CONFIG
 # ============================================================
@@ -42,63 +58,63 @@ PDF_PATH = (
 
 def main():
     if not Path(PDF_PATH).exists():
-        logger.error(f"PDF introuvable: {PDF_PATH}")
+        logger.error("PDF introuvable: %s", PDF_PATH)
         return
     
-    logger.info("="*70)
+    logger.info(BANNER)
     logger.info("🧪 TEST ORCHESTRATEUR CERFA - TOKEN MONITORING")
-    logger.info("="*70)
-    logger.info(f"PDF: {Path(PDF_PATH).name}")
-    logger.info("="*70)
+    logger.info(BANNER)
+    logger.info("PDF: %s", Path(PDF_PATH).name)
+    logger.info(BANNER)
     
     # Analyse complète
     result = analyser_cerfa_complet(PDF_PATH)
     
-    logger.info("="*70)
+    logger.info(BANNER)
     logger.info("📊 RÉSULTATS")
-    logger.info("="*70)
+    logger.info(BANNER)
     
     if result["success"]:
         logger.info("✅ Analyse réussie")
         
         # Infos générales
         info = result["data"]["info_generales"]
-        logger.info(f"\n📍 Commune: {info.get('commune_nom')} ({info.get('commune_insee')})")
-        logger.info(f"   N° CU: {info.get('numero_cu')}")
-        logger.info(f"   Type: {info.get('type_cu')}")
+        logger.info("\n📍 Commune: %s (%s)", info.get("commune_nom"), info.get("commune_insee"))
+        logger.info("   N° CU: %s", info.get("numero_cu"))
+        logger.info("   Type: %s", info.get("type_cu"))
         
         # Parcelles
         parcelles = result["data"]["parcelles_detectees"]
         refs = parcelles.get("references_cadastrales", [])
-        logger.info(f"\n📦 Parcelles: {len(refs)}")
-        logger.info(f"   Superficie totale: {parcelles.get('superficie_totale_m2')} m²")
+        logger.info("\n📦 Parcelles: %d", len(refs))
+        logger.info("   Superficie totale: %s m²", parcelles.get("superficie_totale_m2"))
         
         # Alertes
         alerts = result.get("alerts", [])
         if alerts:
-            logger.warning(f"\n⚠️  Alertes ({len(alerts)}):")
+            logger.warning("\n⚠️  Alertes (%d):", len(alerts))
             for alert in alerts:
-                logger.warning(f"   • {alert}")
+                logger.warning("   • %s", alert)
         
         # Stats
         stats = result["metadata"]["stats"]
-        logger.info(f"\n📈 Stats:")
-        logger.info(f"   Parcelles détectées: {stats.get('nb_parcelles')}")
-        logger.info(f"   Tokens utilisés: {stats.get('tokens')}")
+        logger.info("\n📈 Stats:")
+        logger.info("   Parcelles détectées: %s", stats.get("nb_parcelles"))
+        logger.info("   Tokens utilisés: %s", stats.get("tokens"))
         
     else:
-        logger.error(f"❌ Échec: {result.get('error')}")
-        logger.error(f"   Détails: {result.get('details')}")
+        logger.error("❌ Échec: %s", result.get("error"))
+        logger.error("   Détails: %s", result.get("details"))
         output_path = Path("cerfa_orchestrator_error.json")
-        output_path.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
-        logger.info(f"💾 Résultat d'erreur sauvegardé dans {output_path}")
-        logger.info("="*70)
+        write_json(output_path, result)
+        logger.info("💾 Résultat d'erreur sauvegardé dans %s", output_path)
+        logger.info(BANNER)
 
     # Sauvegarde systématique du résultat brut (succès ou échec)
     output_path = Path("cerfa_orchestrator_result.json")
-    output_path.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
-    logger.info(f"💾 Résultat complet sauvegardé dans {output_path}")
-    logger.info("="*70)
+    write_json(output_path, result)
+    logger.info("💾 Résultat complet sauvegardé dans %s", output_path)
+    logger.info(BANNER)
 
 
 if __name__ == "__main__":
@@ -15,6 +15,7 @@ from __future__ import annotations
 
 import logging
 import os
+from functools import lru_cache
 from typing import Any, Optional
 
 from dotenv import load_dotenv
@@ -42,6 +43,7 @@ INSEE_TO_SLUG: dict[str, str] = {
 ROLES = ("user", "admin_commune", "superadmin")
 
 
+@lru_cache(maxsize=1)
 def _get_supabase():
     if not (SUPABASE_URL and SUPABASE_KEY):
         raise RuntimeError("SUPABASE_URL et SERVICE_KEY requis pour commune_access.")
@@ -112,6 +114,15 @@ def get_user_commune_access(user_id: str) -> list[dict[str, Any]]:
     return access
 
 
+def insee_codes_from_access_rows(rows: list[dict[str, Any]]) -> Optional[list[str]]:
+    """Lignes user_commune_access → None (superadmin), [] ou codes INSEE triés."""
+    if not rows:
+        return []
+    if any((r.get("role") or "").lower() == "superadmin" for r in rows):
+        return None
+    return sorted({str(r["code_insee"]).strip() for r in rows if r.get("code_insee")})
+
+
 def get_authorized_insee_codes(user_id: str) -> Optional[list[str]]:
     """
     None → superadmin (toutes communes), décidé explicitement.
@@ -120,12 +131,7 @@ def get_authorized_insee_codes(user_id: str) -> Optional[list[str]]:
     """
     rows = _fetch_user_commune_access_rows(user_id)
     if rows is not None:
-        if not rows:
-            return []
-        if any((r.get("role") or "").lower() == "superadmin" for r in rows):
-            return None
-        codes = sorted({str(r["code_insee"]).strip() for r in rows if r.get("code_insee")})
-        return codes
+        return insee_codes_from_access_rows(rows)
 
     insee_codes = _fetch_metadata_insee(user_id)
     if not insee_codes:
@@ -43,14 +43,18 @@ def select_pipelines_for_user(
     *,
     user_id: str,
     limit: int = 15,
+    offset: int = 0,
     commune_slug: Optional[str] = None,
     columns: str = "*",
+    with_centroid: bool = False,
 ) -> list[dict]:
     """
     Pipelines visibles pour un utilisateur, scopées par commune (INSEE), pas par auteur.
 
     None dans allowed_insee = superadmin / accès global (pas de filtre INSEE).
     Liste vide = aucun droit explicite → aucun résultat.
+    Pagination : lignes [offset, offset + limit - 1] triées par created_at décroissant.
+    with_centroid : uniquement les lignes dont le centroïde {lon, lat} est stocké.
     """
     allowed_insee = get_authorized_insee_codes(user_id)
     if allowed_insee is not None and not allowed_insee:
@@ -62,7 +66,7 @@ def select_pipelines_for_user(
         .table("pipelines")
         .select(columns)
         .order("created_at", desc=True)
-        .limit(limit)
+        .range(offset, offset + limit - 1)
     )
     query = apply_access_filters(
         query,
@@ -70,6 +74,11 @@ def select_pipelines_for_user(
         commune_slug=commune_slug,
         allowed_insee=allowed_insee,
     )
+    if with_centroid:
+        # ->> : même prédicat que l'index partiel 009 et le chemin asyncpg (JSON null exclu)
+        query = query.filter("centroid->>lon", "not.is", "null").filter(
+            "centroid->>lat", "not.is", "null"
+        )
     response = query.execute()
     pipelines = response.data or []
     return filter_pipelines_for_viewer(pipelines, user_id)
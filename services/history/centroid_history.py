@@ -6,54 +6,242 @@ Récupère les pipelines d'un utilisateur avec centroid (lon/lat) et cerfa_data
 pour afficher les pings sur la carte et les infos au clic.
 
 Filtrage par droits commune (public.user_commune_access ou metadata Auth legacy).
+Lectures via le pool asyncpg de services/history/db.py (fallback supabase-py).
 """
 
-from fastapi import APIRouter, Depends
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as _HistoryJSONResponse
+except ImportError:  # pragma: no cover - orjson optionnel
+    orjson = None
+    _HistoryJSONResponse = JSONResponse
 
 from services.auth.commune_access import assert_authorized_for_commune_slug
 from services.auth.current_user import get_current_user_id
-from services.auth.pipelines_query import select_pipelines_for_user
+from services.auth.pipelines_query import pipelines_schema, select_pipelines_for_user
+from services.history.db import fetch_pipelines_for_user, get_history_pool
 from services.history.pipeline_enrichment import enrich_pipelines_for_history
 
 # Client Supabase injecté depuis main.py
 supabase = None
 
-router = APIRouter(prefix="/pipelines", tags=["pipelines"])
+# orjson : cerfa_data (JSONB imbriqué) sérialisé bien plus vite que json stdlib
+router = APIRouter(
+    prefix="/pipelines",
+    tags=["pipelines"],
+    default_response_class=_HistoryJSONResponse,
+)
 
 _MAP_HISTORY_COLUMNS = (
     "slug, centroid, cerfa_data, commune, commune_slug, code_insee, "
     "output_cua, qr_url, created_at, suivi"
 )
 
+# Projection par défaut de /by_user : colonnes carte + user_id (filtre viewer, libellé
+# créateur) et parcelles (enrichissement centroïde). Plus de select("*").
+_BY_USER_COLUMNS = _MAP_HISTORY_COLUMNS + ", user_id, parcelles, status"
+
+# Colonnes de public.pipelines demandables via ?fields=
+_PIPELINE_COLUMNS = frozenset({
+    "id", "slug", "commune_slug", "commune", "code_insee", "status", "bucket_path",
+    "output_cua", "carte_2d_url", "carte_3d_url", "qr_url", "pipeline_result_url",
+    "user_id", "user_email", "cerfa_data", "parcelles", "centroid",
+    "intersections_gpkg_url", "intersections_json_url", "metadata", "suivi",
+    "created_at", "updated_at",
+})
+
+
+# Cache LRU + TTL des réponses d'historique : la carte est re-pollée en boucle par le
+# front alors que les données changent à l'échelle de la minute. La valeur est le
+# corps JSON déjà sérialisé, sa version gzip et son ETag, calculés une fois au
+# remplissage : les hits ne paient ni sérialisation ni compression.
+# Invalidé après chaque écriture et à la fin d'un job pipeline (app/pipeline_jobs.py).
+# Le cache est par process : avec plusieurs workers uvicorn, ceux qui n'ont pas lancé
+# le job peuvent servir un historique (et des 304) périmé jusqu'au TTL.
+_HISTORY_CACHE: "OrderedDict[tuple, tuple[bytes, bytes | None, str, float]]" = OrderedDict()
+_HISTORY_CACHE_TTL_SEC = int(os.getenv("PIPELINES_HISTORY_CACHE_TTL_SEC", "30"))
+_HISTORY_CACHE_MAXSIZE = int(os.getenv("PIPELINES_HISTORY_CACHE_MAXSIZE", "512"))
+_HISTORY_CACHE_LOCK = threading.Lock()
+
+# Même seuil que GZipMiddleware (main.py) : en dessous, gzip ne vaut pas le coup
+_GZIP_MIN_SIZE = 1024
+
+# /by_user, /map-history : plafond de page (limit non borné = toute la table en cache)
+_HISTORY_MAX_LIMIT = int(os.getenv("PIPELINES_HISTORY_MAX_LIMIT", "1000"))
+
+# /export : plafond dur pour éviter de charger toute la table en mémoire
+_EXPORT_MAX_LIMIT = int(os.getenv("PIPELINES_EXPORT_MAX_LIMIT", "5000"))
+
+# no-cache : le navigateur revalide à chaque poll (304 sans corps si inchangé),
+# sans servir une version périmée après un PATCH suivi.
+_HISTORY_CACHE_CONTROL = "private, no-cache"
+
+
+def invalidate_history_cache() -> None:
+    """
+    Vide le cache d'historique (appelé après une écriture sur une pipeline).
+    La visibilité étant par commune et non par auteur, une modification concerne
+    potentiellement plusieurs utilisateurs : on vide tout plutôt que par user_id.
+    """
+    with _HISTORY_CACHE_LOCK:
+        _HISTORY_CACHE.clear()
+
+
+def _dumps(payload: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _build_history_body(rows: list[dict]) -> tuple[bytes, bytes | None, str]:
+    pipelines = enrich_pipelines_for_history(rows)
+    body = _dumps({"success": True, "count": len(pipelines), "pipelines": pipelines})
+    body_gz = gzip.compress(body, compresslevel=6) if len(body) >= _GZIP_MIN_SIZE else None
+    return body, body_gz, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+async def _fetch_history_body(
+    user_id: str,
+    limit: int,
+    offset: int,
+    commune_slug: str | None,
+    columns: str,
+    with_centroid: bool = False,
+) -> tuple[bytes, bytes | None, str]:
+    """Corps JSON (brut + gzip) et ETag (blake2b du corps), servis depuis le cache si frais."""
+    key = (user_id, limit, offset, commune_slug, columns, with_centroid)
+    now = time.time()
+    with _HISTORY_CACHE_LOCK:
+        item = _HISTORY_CACHE.get(key)
+        if item and item[3] > now:
+            _HISTORY_CACHE.move_to_end(key)
+            return item[0], item[1], item[2]
+
+    pool = await get_history_pool()
+    if pool is not None:
+        rows = await fetch_pipelines_for_user(
+            pool,
+            pipelines_schema(),
+            user_id=user_id,
+            limit=limit,
+            offset=offset,
+            commune_slug=commune_slug,
+            columns=columns,
+            with_centroid=with_centroid,
+        )
+    else:
+        rows = await asyncio.to_thread(
+            select_pipelines_for_user,
+            supabase,
+            user_id=user_id,
+            limit=limit,
+            offset=offset,
+            commune_slug=commune_slug,
+            columns=columns,
+            with_centroid=with_centroid,
+        )
+    body, body_gz, etag = await asyncio.to_thread(_build_history_body, rows)
+
+    with _HISTORY_CACHE_LOCK:
+        _HISTORY_CACHE[key] = (body, body_gz, etag, now + _HISTORY_CACHE_TTL_SEC)
+        _HISTORY_CACHE.move_to_end(key)
+        while len(_HISTORY_CACHE) > _HISTORY_CACHE_MAXSIZE:
+            _HISTORY_CACHE.popitem(last=False)
+    return body, body_gz, etag
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {c.strip().removeprefix("W/") for c in header.split(",")}
+    return etag in candidates
+
+
+def _accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def _history_response(
+    request: Request,
+    body: bytes,
+    body_gz: bytes | None,
+    etag: str,
+) -> Response:
+    """
+    200 avec le corps pré-sérialisé (gzip pré-calculé si accepté),
+    ou 304 sans corps si If-None-Match correspond.
+    """
+    headers = {"Cache-Control": _HISTORY_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if body_gz is not None and _accepts_gzip(request):
+        # ETag distinct par représentation (RFC 9110)
+        etag = etag[:-1] + '-gzip"'
+        headers["Content-Encoding"] = "gzip"
+        body = body_gz
+    headers["ETag"] = etag
+
+    if _etag_matches(request, etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _parse_fields(fields: str | None, default: str) -> str:
+    """Valide ?fields=a,b,c contre la liste blanche ; user_id toujours inclus (filtre viewer)."""
+    if not fields:
+        return default
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - _PIPELINE_COLUMNS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Colonnes inconnues : {', '.join(unknown)}")
+
+    if "user_id" not in requested:
+        requested.append("user_id")
+    return ", ".join(dict.fromkeys(requested))
+
 
 @router.get("/by_user")
-def get_pipelines_by_user(
-    limit: int = 15,
+async def get_pipelines_by_user(
+    request: Request,
+    limit: int = Query(15, ge=1, le=_HISTORY_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
     commune_slug: str | None = None,
+    fields: str | None = None,
+    with_centroid: bool = False,
     user_id: str = Depends(get_current_user_id),
 ):
     """
     Historique des pipelines visibles pour l'utilisateur (scope commune, pas auteur).
     Option commune_slug : ne retourne que les CUAs de la commune affichée.
+    Option fields : colonnes à renvoyer (liste blanche), sinon projection historique.
+    Option offset : pagination (avec limit).
+    Option with_centroid : uniquement les pipelines avec centroïde stocké (filtre SQL).
+    Requête conditionnelle : If-None-Match == ETag → 304 sans corps.
     """
     if commune_slug:
-        assert_authorized_for_commune_slug(user_id, commune_slug)
+        await asyncio.to_thread(assert_authorized_for_commune_slug, user_id, commune_slug)
+    columns = _parse_fields(fields, _BY_USER_COLUMNS)
 
     try:
-        pipelines = enrich_pipelines_for_history(
-            select_pipelines_for_user(
-                supabase,
-                user_id=user_id,
-                limit=limit,
-                commune_slug=commune_slug,
-                columns="*",
-            )
+        body, body_gz, etag = await _fetch_history_body(
+            user_id, limit, offset, commune_slug, columns, with_centroid
         )
-        return {
-            "success": True,
-            "count": len(pipelines),
-            "pipelines": pipelines,
-        }
+        return _history_response(request, body, body_gz, etag)
 
     except Exception as e:
         return {
@@ -63,32 +251,79 @@ def get_pipelines_by_user(
 
 
 @router.get("/map-history")
-def get_pipelines_map_history(
-    limit: int = 15,
+async def get_pipelines_map_history(
+    request: Request,
+    limit: int = Query(15, ge=1, le=_HISTORY_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
     commune_slug: str | None = None,
+    with_centroid: bool = False,
     user_id: str = Depends(get_current_user_id),
 ):
     """
     Variante légère : slug, centroid, cerfa_data pour l'affichage carte.
+    Option with_centroid : ignore en SQL les pipelines sans centroïde stocké.
+    Requête conditionnelle : If-None-Match == ETag → 304 sans corps.
+    """
+    if commune_slug:
+        await asyncio.to_thread(assert_authorized_for_commune_slug, user_id, commune_slug)
+
+    try:
+        body, body_gz, etag = await _fetch_history_body(
+            user_id, limit, offset, commune_slug, _MAP_HISTORY_COLUMNS, with_centroid
+        )
+        return _history_response(request, body, body_gz, etag)
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+        }
+
+
+@router.get("/export")
+async def export_pipelines(
+    limit: int = 1000,
+    commune_slug: str | None = None,
+    fields: str | None = None,
+    with_centroid: bool = False,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Export tableau de bord : lignes brutes (sans enrichissement centroïde ni cache),
+    lues en une requête via le pool asyncpg. limit plafonné à PIPELINES_EXPORT_MAX_LIMIT.
     """
     if commune_slug:
-        assert_authorized_for_commune_slug(user_id, commune_slug)
+        await asyncio.to_thread(assert_authorized_for_commune_slug, user_id, commune_slug)
+    columns = _parse_fields(fields, _BY_USER_COLUMNS)
+    limit = max(1, min(limit, _EXPORT_MAX_LIMIT))
 
     try:
-        pipelines = enrich_pipelines_for_history(
-            select_pipelines_for_user(
+        pool = await get_history_pool()
+        if pool is not None:
+            rows = await fetch_pipelines_for_user(
+                pool,
+                pipelines_schema(),
+                user_id=user_id,
+                limit=limit,
+                offset=0,
+                commune_slug=commune_slug,
+                columns=columns,
+                with_centroid=with_centroid,
+            )
+        else:
+            rows = await asyncio.to_thread(
+                select_pipelines_for_user,
                 supabase,
                 user_id=user_id,
                 limit=limit,
                 commune_slug=commune_slug,
-                columns=_MAP_HISTORY_COLUMNS,
+                columns=columns,
+                with_centroid=with_centroid,
             )
+        body = await asyncio.to_thread(
+            _dumps, {"success": True, "count": len(rows), "pipelines": rows}
         )
-        return {
-            "success": True,
-            "count": len(pipelines),
-            "pipelines": pipelines,
-        }
+        return Response(content=body, media_type="application/json")
 
     except Exception as e:
         return {
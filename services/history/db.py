@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+db.py — Pool asyncpg partagé pour les lectures chaudes de l'historique des pipelines
+------------------------------------------------------------------------------------
+/pipelines/by_user, /pipelines/map-history et GET /pipelines/{slug}/suivi lisent
+directement Postgres (protocole binaire) au lieu de passer par PostgREST (HTTPS + JSON).
+Les écritures restent sur le client Supabase.
+
+Le pool est ouvert au démarrage (main.py) et fermé à l'arrêt. Si la DB n'est pas
+configurée (DATABASE_URL / SUPABASE_*), get_history_pool() renvoie None et les
+appelants retombent sur supabase-py. Si la connexion échoue, même repli, et nouvel
+essai après HISTORY_DB_RETRY_SEC.
+
+Pool distinct de celui de router_reglements : codecs JSON (dict comme PostgREST)
+et dimensionnement propres aux lectures d'historique.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from decimal import Decimal
+from typing import Any, Optional
+
+import asyncpg
+
+from services.auth.commune_access import (
+    filter_pipelines_for_viewer,
+    get_authorized_insee_codes,
+    insee_codes_from_access_rows,
+)
+from utils.pg_dsn import database_dsn, uses_pgbouncer
+
+logger = logging.getLogger("history.db")
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock = asyncio.Lock()
+_pool_disabled = False  # DB non configurée : définitif
+_pool_retry_at = 0.0  # échec de connexion : pas de nouvel essai avant (time.monotonic)
+
+_POOL_RETRY_SEC = float(os.getenv("HISTORY_DB_RETRY_SEC", "30"))
+_POOL_CONNECT_TIMEOUT_SEC = float(os.getenv("HISTORY_DB_CONNECT_TIMEOUT_SEC", "5"))
+
+_IDENT_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    # JSON/JSONB décodés en dict comme avec PostgREST
+    for typename in ("json", "jsonb"):
+        await conn.set_type_codec(
+            typename, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+async def get_history_pool() -> Optional[asyncpg.Pool]:
+    global _pool, _pool_disabled, _pool_retry_at
+    if _pool is not None or _pool_disabled or time.monotonic() < _pool_retry_at:
+        return _pool
+    async with _pool_lock:
+        if _pool is not None or _pool_disabled or time.monotonic() < _pool_retry_at:
+            return _pool
+        try:
+            dsn = database_dsn()
+        except RuntimeError as e:
+            logger.warning("⚠️ Pool historique désactivé (%s) — fallback supabase-py", e)
+            _pool_disabled = True
+            return None
+        try:
+            _pool = await asyncpg.create_pool(
+                dsn,
+                min_size=int(os.getenv("HISTORY_DB_POOL_MIN", "4")),
+                max_size=int(os.getenv("HISTORY_DB_POOL_MAX", "20")),
+                # pgbouncer (mode transaction) ne supporte pas les prepared statements nommés
+                statement_cache_size=0 if uses_pgbouncer(dsn) else 256,
+                init=_init_connection,
+                timeout=_POOL_CONNECT_TIMEOUT_SEC,
+            )
+        except Exception as e:
+            logger.warning(
+                "⚠️ Connexion Postgres impossible (%s) — fallback supabase-py, nouvel essai dans %.0fs",
+                e, _POOL_RETRY_SEC,
+            )
+            _pool_retry_at = time.monotonic() + _POOL_RETRY_SEC
+            return None
+    return _pool
+
+
+async def close_history_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def fetch_authorized_insee_codes(user_id: str) -> Optional[list[str]]:
+    """
+    Équivalent async de get_authorized_insee_codes : lit public.user_commune_access via le
+    pool (connexion empruntée le temps de la requête). Pool indisponible, table absente ou
+    erreur → chemin supabase-py (avec fallback metadata Auth) dans un thread.
+    """
+    pool = await get_history_pool()
+    if pool is not None:
+        try:
+            records = await pool.fetch(
+                "SELECT role, code_insee FROM public.user_commune_access WHERE user_id = $1",
+                user_id,
+            )
+            return insee_codes_from_access_rows([dict(r) for r in records])
+        except Exception as e:
+            logger.debug("user_commune_access via pool indisponible (%s) — fallback", e)
+    return await asyncio.to_thread(get_authorized_insee_codes, user_id)
+
+
+def _qualified_table(schema: str) -> str:
+    if not _IDENT_RE.match(schema):
+        raise ValueError(f"Schéma invalide : {schema!r}")
+    return f'"{schema}".pipelines'
+
+
+def _serialize_row(record: asyncpg.Record) -> dict[str, Any]:
+    """Record → dict aux formats PostgREST (timestamps ISO, uuid en str)."""
+    row = dict(record)
+    for k, v in row.items():
+        if hasattr(v, "isoformat"):
+            row[k] = v.isoformat()
+        elif isinstance(v, Decimal):
+            row[k] = float(v)
+        elif v is not None and not isinstance(v, (str, int, float, bool, dict, list)):
+            row[k] = str(v)
+    return row
+
+
+async def fetch_pipelines_for_user(
+    pool: asyncpg.Pool,
+    schema: str,
+    *,
+    user_id: str,
+    limit: int,
+    offset: int,
+    commune_slug: Optional[str],
+    columns: str,
+    with_centroid: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Équivalent asyncpg de select_pipelines_for_user (scope commune, tri created_at desc).
+    `columns` doit provenir de la liste blanche de centroid_history.
+    """
+    allowed_insee = await fetch_authorized_insee_codes(user_id)
+    if allowed_insee is not None and not allowed_insee:
+        return []
+
+    where: list[str] = []
+    args: list[Any] = []
+    if allowed_insee:
+        args.append(allowed_insee)
+        where.append(f"code_insee = ANY(${len(args)}::text[])")
+    if commune_slug:
+        args.append(commune_slug.strip().lower())
+        where.append(f"(commune_slug = ${len(args)} OR commune ILIKE ${len(args)})")
+    if with_centroid:
+        # Même prédicat que l'index partiel idx_pipelines_centroid_valid (009)
+        where.append("(centroid->>'lon') IS NOT NULL AND (centroid->>'lat') IS NOT NULL")
+
+    args.extend([limit, offset])
+    sql = (
+        f"SELECT {columns} FROM {_qualified_table(schema)}"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + f" ORDER BY created_at DESC LIMIT ${len(args) - 1} OFFSET ${len(args)}"
+    )
+    records = await pool.fetch(sql, *args)
+    pipelines = [_serialize_row(r) for r in records]
+    return await asyncio.to_thread(filter_pipelines_for_viewer, pipelines, user_id)
+
+
+async def fetch_pipeline_by_slug(
+    pool: asyncpg.Pool,
+    schemas: list[str],
+    slug: str,
+    columns: str = "*",
+) -> tuple[str, dict[str, Any]] | None:
+    """
+    Équivalent asyncpg de project_management._fetch_pipeline_by_slug.
+    `columns` : liste SQL constante (pas d'entrée utilisateur), ex. colonnes calculées.
+    """
+    for schema in schemas:
+        record = await pool.fetchrow(
+            f"SELECT {columns} FROM {_qualified_table(schema)} WHERE slug = $1 LIMIT 1", slug
+        )
+        if record is not None:
+            return schema, _serialize_row(record)
+    return None
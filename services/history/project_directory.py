@@ -8,6 +8,7 @@ project_directory.py — Dossier logique par projet + fichiers associés
 
 from __future__ import annotations
 
+import asyncio
 import mimetypes
 from datetime import datetime
 from typing import Any, Dict, Optional
@@ -142,6 +143,44 @@ def list_project_files(slug: str, user_id: str = Depends(get_current_user_id)):
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+def _store_project_file(
+    slug: str,
+    user_id: str,
+    file_kind: str,
+    filename: Optional[str],
+    content_type: Optional[str],
+    content: bytes,
+) -> Dict[str, Any]:
+    """Contrôle d'accès + upload Storage + métadonnées (appels bloquants, hors boucle async)."""
+    assert_can_view_pipeline(slug, user_id)
+    ensure_project_directory(supabase, slug=slug, user_id=user_id, created_by=user_id)
+    content_type = content_type or mimetypes.guess_type(filename or "")[0] or "application/octet-stream"
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    safe_name = (filename or "document.bin").replace("/", "_")
+    storage_path = f"projects/{slug}/{file_kind}/{timestamp}_{safe_name}"
+
+    supabase.storage.from_(PROJECT_BUCKET).upload(
+        path=storage_path,
+        file=content,
+        file_options={"content-type": content_type, "upsert": "true"},
+    )
+    public_url = f"{SUPABASE_URL}/storage/v1/object/public/{PROJECT_BUCKET}/{storage_path}"
+
+    return register_project_file(
+        supabase,
+        slug=slug,
+        file_kind=file_kind,
+        filename=filename or safe_name,
+        storage_path=storage_path,
+        public_url=public_url,
+        storage_bucket=PROJECT_BUCKET,
+        mime_type=content_type,
+        size_bytes=len(content),
+        uploaded_by=user_id,
+        source="user_upload",
+    )
+
+
 @router.post("/{slug}/files/upload")
 async def upload_project_file(
     slug: str,
@@ -150,33 +189,15 @@ async def upload_project_file(
     user_id: str = Depends(get_current_user_id),
 ):
     try:
-        assert_can_view_pipeline(slug, user_id)
-        ensure_project_directory(supabase, slug=slug, user_id=user_id, created_by=user_id)
         content = await file.read()
-        content_type = file.content_type or mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        safe_name = (file.filename or "document.bin").replace("/", "_")
-        storage_path = f"projects/{slug}/{file_kind}/{timestamp}_{safe_name}"
-
-        supabase.storage.from_(PROJECT_BUCKET).upload(
-            path=storage_path,
-            file=content,
-            file_options={"content-type": content_type, "upsert": "true"},
-        )
-        public_url = f"{SUPABASE_URL}/storage/v1/object/public/{PROJECT_BUCKET}/{storage_path}"
-
-        file_row = register_project_file(
-            supabase,
-            slug=slug,
-            file_kind=file_kind,
-            filename=file.filename or safe_name,
-            storage_path=storage_path,
-            public_url=public_url,
-            storage_bucket=PROJECT_BUCKET,
-            mime_type=content_type,
-            size_bytes=len(content),
-            uploaded_by=user_id,
-            source="user_upload",
+        file_row = await asyncio.to_thread(
+            _store_project_file,
+            slug,
+            user_id,
+            file_kind,
+            file.filename,
+            file.content_type,
+            content,
         )
         return {"success": True, "file": file_row}
     except HTTPException:
@@ -23,6 +23,7 @@ from services.auth.commune_access import (
 )
 from services.auth.current_user import get_current_user_id
 from services.auth.pipelines_query import pipelines_schema
+from services.history.centroid_history import invalidate_history_cache
 
 supabase = None
 
@@ -172,6 +173,7 @@ def update_pipeline_fields(
         )
         if not response.data:
             raise HTTPException(status_code=404, detail=f"Pipeline {slug} introuvable")
+        invalidate_history_cache()
 
         return {"success": True, "slug": slug, "pipeline": response.data[0]}
     except HTTPException:
@@ -199,6 +201,7 @@ def delete_pipeline(slug: str, user_id: str = Depends(get_current_user_id)):
         )
 
         _delete_project_artifacts(slug)
+        invalidate_history_cache()
 
         return {
             "success": True,
@@ -6,11 +6,19 @@ GET  /pipelines/{slug}/suivi  → récupère l'étape de suivi
 PATCH /pipelines/{slug}/suivi → met à jour l'étape (1 à 4)
 """
 
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 
 from services.auth.current_user import get_current_user_id
-from services.history.project_management import _assert_can_modify, _fetch_pipeline_by_slug
+from services.history.centroid_history import invalidate_history_cache
+from services.history.db import fetch_pipeline_by_slug, get_history_pool
+from services.history.project_management import (
+    _assert_can_modify,
+    _fetch_pipeline_by_slug,
+    _pipeline_schemas,
+)
 
 # Client Supabase injecté depuis main.py
 supabase = None
@@ -18,27 +26,43 @@ supabase = None
 router = APIRouter(prefix="/pipelines", tags=["pipelines"])
 
 
+# Étape affichée tant que suivi n'a jamais été renseigné (2 = Dossier traité)
+SUIVI_PAR_DEFAUT = 2
+
+# Défaut appliqué par Postgres : la colonne revient toujours en int
+_SUIVI_COLUMNS = f"*, COALESCE(suivi, {SUIVI_PAR_DEFAUT})::int AS suivi_effectif"
+
+
 class SuiviUpdate(BaseModel):
     suivi: int = Field(..., ge=1, le=4, description="Étape : 1=Dossier reçu, 2=Dossier traité, 3=Validé/corrigé, 4=CUA délivré")
 
 
 @router.get("/{slug}/suivi")
-def get_pipeline_suivi(slug: str, user_id: str = Depends(get_current_user_id)):
+async def get_pipeline_suivi(slug: str, user_id: str = Depends(get_current_user_id)):
     """
-    Récupère l'étape de suivi d'un pipeline par son slug.
+    Récupère l'étape de suivi d'un pipeline par son slug (lecture via le pool asyncpg).
     """
     try:
-        found = _fetch_pipeline_by_slug(slug)
+        pool = await get_history_pool()
+        if pool is not None:
+            found = await fetch_pipeline_by_slug(
+                pool, _pipeline_schemas(), slug, columns=_SUIVI_COLUMNS
+            )
+        else:
+            found = await asyncio.to_thread(_fetch_pipeline_by_slug, slug)
         if not found:
             raise HTTPException(status_code=404, detail=f"Pipeline {slug} introuvable")
 
         schema, row = found
-        _assert_can_modify(row, user_id)
-        suivi = row.get("suivi")
+        await asyncio.to_thread(_assert_can_modify, row, user_id)
+        if "suivi_effectif" in row:
+            suivi = row["suivi_effectif"]
+        else:  # fallback supabase-py : pas de COALESCE côté PostgREST
+            suivi = int(row["suivi"]) if row.get("suivi") is not None else SUIVI_PAR_DEFAUT
         return {
             "success": True,
             "slug": slug,
-            "suivi": int(suivi) if suivi is not None else 2,
+            "suivi": suivi,
         }
     except HTTPException:
         raise
@@ -53,7 +77,7 @@ def update_pipeline_suivi(
     user_id: str = Depends(get_current_user_id),
 ):
     """
-    Met à jour l'étape de suivi d'un pipeline.
+    Met à jour l'étape de suivi d'un pipeline et renvoie la valeur stockée.
     """
     try:
         found = _fetch_pipeline_by_slug(slug)
@@ -63,19 +87,23 @@ def update_pipeline_suivi(
         schema, row = found
         _assert_can_modify(row, user_id)
 
+        # return=representation : la ligne mise à jour revient dans la même requête,
+        # le front n'a pas besoin de refaire un GET /suivi pour confirmer.
         response = (
             supabase.schema(schema)
             .table("pipelines")
-            .update({"suivi": body.suivi})
+            .update({"suivi": body.suivi}, returning="representation")
             .eq("slug", slug)
             .execute()
         )
         if not response.data:
             raise HTTPException(status_code=404, detail=f"Pipeline {slug} introuvable")
+        invalidate_history_cache()
+        updated = response.data[0]
         return {
             "success": True,
-            "slug": slug,
-            "suivi": body.suivi,
+            "slug": updated.get("slug", slug),
+            "suivi": updated.get("suivi", body.suivi),
         }
     except HTTPException:
         raise
@@ -322,7 +322,7 @@ async def start_batch_job(
         seen_stems.add(stem)
 
         dest = inputs_dir / f"{stem}.txt"
-        dest.write_bytes(data)
+        await asyncio.to_thread(dest.write_bytes, data)
         input_files.append((stem, dest))
 
     JOBS[job_id] = {
@@ -212,7 +212,7 @@ async def start_batch_job(
         label_zone = _label_zone_from_basename(output_basename)
 
         dest = inputs_dir / output_basename
-        dest.write_bytes(data)
+        await asyncio.to_thread(dest.write_bytes, data)
         input_files.append((output_basename, label_zone, dest))
 
     JOBS[job_id] = {
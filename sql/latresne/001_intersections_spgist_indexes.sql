@@ -0,0 +1,72 @@
+-- 001_intersections_spgist_indexes.sql
+-- Index spatiaux SP-GiST sur les couches du catalogue d'intersections
+-- (api/communes/latresne/cuas/catalogues/catalogue_intersections_tagged.json).
+-- Charge en lecture seule (`&&` + ST_Intersects / ST_Within) : SP-GiST est plus
+-- compact et plus rapide que GiST sur ce profil. Requiert PostGIS >= 2.5.
+-- Remplace les index GiST existants sur geom_2154 ; idempotent, ignore les tables absentes.
+-- Mettre à jour la liste si le catalogue évolue.
+
+DO $$
+DECLARE
+    tbl text;
+    idx record;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        'pm1_detaillee_gironde',
+        'aoc_viticoles',
+        'debroussaillement',
+        'france_zonage_sismique',
+        'galerie_cheminement_et_pilier',
+        'haies_bocages_latresne',
+        'preemption',
+        'mouvements_de_terrain_ponctuels',
+        'nuisances_sonores_gironde',
+        'patrimoine_naturel_latresne',
+        'zonage_plu',
+        'prescriptions_lin_latresne',
+        'prescriptions_pct_latresne',
+        'prescriptions_surf_latresne',
+        'radon',
+        'eaux_potables_lin',
+        'eaux_potables_pct',
+        'eaux_usees_lin',
+        'eaux_usees_pct',
+        'reseaux_hta',
+        'retrait_gonflement_argiles_gironde',
+        'retrait_gonflement_argiles_gironde_2026',
+        'secteurs_carrieres_comblees',
+        'troncons_et_fosses_latresne',
+        'zaenr_zones',
+        'zbrs_gironde',
+        'seveso_buffers',
+        'icpe_seveso',
+        'risque_mouvement_de_terrain',
+        'pprmvt_latresne'
+    ]
+    LOOP
+        IF to_regclass(format('latresne.%I', tbl)) IS NULL THEN
+            RAISE NOTICE 'latresne.% absente — ignorée', tbl;
+            CONTINUE;
+        END IF;
+
+        -- Anciens index GiST sur la colonne géométrique
+        FOR idx IN
+            SELECT ic.relname AS name
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = ic.relam
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY (i.indkey)
+            WHERE i.indrelid = format('latresne.%I', tbl)::regclass
+              AND am.amname = 'gist'
+              AND a.attname = 'geom_2154'
+        LOOP
+            EXECUTE format('DROP INDEX IF EXISTS latresne.%I', idx.name);
+        END LOOP;
+
+        EXECUTE format(
+            'CREATE INDEX IF NOT EXISTS %I ON latresne.%I USING SPGIST (geom_2154)',
+            tbl || '_geom_2154_spgist_idx', tbl
+        );
+        EXECUTE format('ANALYZE latresne.%I', tbl);
+    END LOOP;
+END $$;
@@ -0,0 +1,9 @@
+-- 008_pipelines_history_index.sql
+-- Index couvrant pour l'historique (/pipelines/by_user, /pipelines/map-history).
+-- Les requêtes filtrent par code_insee (droits commune) puis ORDER BY created_at DESC
+-- LIMIT/OFFSET : index scan au lieu d'un tri après filtre.
+-- CONCURRENTLY → ne pas exécuter dans une transaction (pas de BEGIN/COMMIT).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pipelines_insee_created
+    ON public.pipelines (code_insee, created_at DESC)
+    INCLUDE (slug, commune_slug, commune, user_id, suivi);
@@ -0,0 +1,12 @@
+-- 009_pipelines_centroid_index.sql
+-- Index partiel pour ?with_centroid=true (/pipelines/by_user, /pipelines/map-history) :
+-- seules les pipelines avec un centroïde {lon, lat} stocké sont indexées, le filtre
+-- est résolu par Postgres au lieu d'être fait côté Python / front.
+-- Prédicat identique côté asyncpg (services/history/db.py) et PostgREST
+-- (centroid->>lon not.is.null, services/auth/pipelines_query.py) : ->> renvoie NULL
+-- aussi pour une valeur JSON null ({"lon": null}).
+-- CONCURRENTLY → ne pas exécuter dans une transaction (pas de BEGIN/COMMIT).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pipelines_centroid_valid
+    ON public.pipelines (code_insee, created_at DESC)
+    WHERE (centroid->>'lon') IS NOT NULL AND (centroid->>'lat') IS NOT NULL;
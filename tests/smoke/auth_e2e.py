@@ -3,6 +3,8 @@
 
 from __future__ import annotations
 
+import atexit
+import importlib.util
 import json
 import os
 from dataclasses import dataclass
@@ -14,6 +16,21 @@ PROD_API_BASE = os.getenv("AUTH_TEST_PROD_API_BASE", "https://api.kerelia.fr").r
 UA = "Mozilla/5.0 (Kerelia auth test)"
 
 
+_client: httpx.Client | None = None
+
+
+def http_client() -> httpx.Client:
+    """Client partagé (keep-alive, HTTP/2 si h2 installé) : un seul handshake TLS par hôte."""
+    global _client
+    if _client is None:
+        _client = httpx.Client(
+            timeout=20.0,
+            http2=importlib.util.find_spec("h2") is not None,
+        )
+        atexit.register(_client.close)
+    return _client
+
+
 class AuthE2EError(RuntimeError):
     """Erreur login ou config Supabase."""
 
@@ -44,12 +61,11 @@ def supabase_config() -> tuple[str, str]:
 def supabase_sign_in(email: str, password: str) -> dict:
     """Login password Supabase → access_token + user."""
     url, key = supabase_config()
-    with httpx.Client(timeout=20.0) as client:
-        resp = client.post(
-            f"{url}/auth/v1/token?grant_type=password",
-            headers={"apikey": key, "Content-Type": "application/json"},
-            json={"email": email, "password": password},
-        )
+    resp = http_client().post(
+        f"{url}/auth/v1/token?grant_type=password",
+        headers={"apikey": key, "Content-Type": "application/json"},
+        json={"email": email, "password": password},
+    )
     if resp.status_code != 200:
         try:
             body = resp.json()
@@ -86,8 +102,7 @@ def api_get(
     if query_user_id:
         params["user_id"] = query_user_id
     url = f"{api_base}{path}"
-    with httpx.Client(timeout=20.0) as client:
-        return client.get(url, headers=headers, params=params or None)
+    return http_client().get(url, headers=headers, params=params or None)
 
 
 def _json_body(resp: httpx.Response) -> dict:
@@ -168,11 +183,10 @@ def run_checks(
         )
 
     url, key = supabase_config()
-    with httpx.Client(timeout=20.0) as client:
-        vr = client.get(
-            f"{url}/auth/v1/user",
-            headers={"apikey": key, "Authorization": f"Bearer {token}"},
-        )
+    vr = http_client().get(
+        f"{url}/auth/v1/user",
+        headers={"apikey": key, "Authorization": f"Bearer {token}"},
+    )
     results.append(
         CheckResult(
             name="Supabase /auth/v1/user (comme le backend)",
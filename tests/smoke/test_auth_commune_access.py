@@ -16,7 +16,7 @@ from __future__ import annotations
 
 import pytest
 
-from tests.smoke.auth_e2e import api_get, run_checks, supabase_config
+from tests.smoke.auth_e2e import api_get, http_client, run_checks, supabase_config
 
 pytestmark = pytest.mark.smoke
 
@@ -73,17 +73,14 @@ def test_superadmin_when_expected(
 
 def test_supabase_token_valid_like_backend(auth_session: dict) -> None:
     """Même validation que services/auth/current_user.py."""
-    import httpx
-
     url, key = supabase_config()
-    with httpx.Client(timeout=20.0) as client:
-        resp = client.get(
-            f"{url}/auth/v1/user",
-            headers={
-                "apikey": key,
-                "Authorization": f"Bearer {auth_session['access_token']}",
-            },
-        )
+    resp = http_client().get(
+        f"{url}/auth/v1/user",
+        headers={
+            "apikey": key,
+            "Authorization": f"Bearer {auth_session['access_token']}",
+        },
+    )
     assert resp.status_code == 200, resp.text
     assert resp.json().get("id") == auth_session["user_id"]
 
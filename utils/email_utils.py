@@ -8,6 +8,9 @@ SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 INTERNAL_EMAIL = os.getenv("INTERNAL_NOTIFICATION_EMAIL")  # ex: contact@kerelia.fr
 FROM_EMAIL = os.getenv("FROM_EMAIL")  # ex: hello@kerelia.fr
 
+# Client SendGrid partagé par tous les envois (construit une seule fois au chargement)
+_SG = SendGridAPIClient(SENDGRID_API_KEY) if SENDGRID_API_KEY else None
+
 
 # ======================================================
 # 📩 EMAIL 1 : NOTIFICATION INTERNE (déjà existant)
@@ -43,8 +46,7 @@ def send_internal_email(lead: dict):
     )
 
     try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        sg.send(message)
+        _SG.send(message)
         print("📨 Email interne envoyé avec succès.")
     except Exception as e:
         print("❌ Erreur SendGrid :", e)
@@ -164,8 +166,7 @@ def send_password_reset_email(to_email: str, reset_url: str):
     )
 
     try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        sg.send(message)
+        _SG.send(message)
         print(f"📨 Email reset envoyé → {to_email}")
     except Exception as e:
         print("❌ Erreur SendGrid (reset password) :", e)
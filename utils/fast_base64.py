@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+fast_base64.py — Encodage base64 des images envoyées aux LLM vision
+--------------------------------------------------------------------
+pybase64 (SIMD) si installé, sinon module standard : même API.
+"""
+
+try:
+    from pybase64 import b64decode, b64encode
+except ImportError:
+    from base64 import b64decode, b64encode
+
+__all__ = ["b64decode", "b64encode"]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+geo.py — Transformers pyproj partagés
+-------------------------------------
+La construction d'un Transformer charge la base PROJ (~100 ms) : un seul par couple de CRS.
+"""
+
+from functools import lru_cache
+
+from pyproj import Transformer
+
+
+@lru_cache(maxsize=32)
+def get_transformer(src_crs: str, dst_crs: str) -> Transformer:
+    """Transformer src → dst (always_xy), construit une fois par couple de CRS."""
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+def l93_to_wgs84() -> Transformer:
+    """Lambert-93 (EPSG:2154) → WGS84 (EPSG:4326)."""
+    return get_transformer("EPSG:2154", "EPSG:4326")
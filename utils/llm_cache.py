@@ -0,0 +1,99 @@
+# backend/utils/llm_cache.py
+# -*- coding: utf-8 -*-
+"""
+Cache mémoire exact-match des réponses LLM déterministes.
+
+Seuls les appels explicitement à temperature == 0 sont mis en cache : la clé est
+le SHA-256 de (fonction, paramètres d'appel). LRU + TTL, thread-safe, par processus.
+
+Single-flight : si un appel identique est déjà en cours, les appelants concurrents
+attendent son résultat au lieu de relancer la requête fournisseur.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+LLM_CACHE_TTL_SEC = int(os.getenv("LLM_CACHE_TTL_SEC", "3600"))
+LLM_CACHE_MAXSIZE = int(os.getenv("LLM_CACHE_MAXSIZE", "256"))
+
+# clé → (réponse, expiration monotonic)
+_CACHE: "OrderedDict[str, tuple[object, float]]" = OrderedDict()
+_LOCK = threading.Lock()
+# clé → Future de l'appel en cours
+_INFLIGHT: "dict[str, Future]" = {}
+
+
+def _cache_key(fn_name: str, kwargs: dict) -> str:
+    payload = json.dumps({"fn": fn_name, **kwargs}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def clear_llm_cache() -> None:
+    with _LOCK:
+        _CACHE.clear()
+
+
+def _lookup(key: str, now: float):
+    """Renvoie (True, réponse) si la clé est en cache et non expirée. Appelé sous _LOCK."""
+    hit = _CACHE.get(key)
+    if hit is not None:
+        if hit[1] > now:
+            _CACHE.move_to_end(key)
+            return True, hit[0]
+        del _CACHE[key]
+    return False, None
+
+
+def _store(key: str, result, now: float) -> None:
+    """Appelé sous _LOCK."""
+    _CACHE[key] = (result, now + LLM_CACHE_TTL_SEC)
+    _CACHE.move_to_end(key)
+    while len(_CACHE) > LLM_CACHE_MAXSIZE:
+        _CACHE.popitem(last=False)
+
+
+def cached_llm(fn):
+    """
+    Décorateur pour les wrappers LLM à arguments nommés (call_mistral, call_gpt_4…).
+    Les appels sans temperature=0 passent directement au fournisseur.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(**kwargs):
+        if kwargs.get("temperature") != 0 or LLM_CACHE_MAXSIZE <= 0:
+            return fn(**kwargs)
+
+        key = _cache_key(fn.__qualname__, kwargs)
+        with _LOCK:
+            found, value = _lookup(key, time.monotonic())
+            if found:
+                return value
+            pending = _INFLIGHT.get(key)
+            if pending is None:
+                _INFLIGHT[key] = leader = Future()
+
+        if pending is not None:
+            return pending.result()
+
+        try:
+            result = fn(**kwargs)
+        except BaseException as e:
+            with _LOCK:
+                _INFLIGHT.pop(key, None)
+            leader.set_exception(e)
+            raise
+
+        with _LOCK:
+            _store(key, result, time.monotonic())
+            _INFLIGHT.pop(key, None)
+        leader.set_result(result)
+        return result
+
+    return wrapper
+
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+llm_clients.py — Clients SDK LLM partagés par clé API
+------------------------------------------------------
+Un client par clé et par process : pool HTTP keep-alive réutilisé entre extractions.
+"""
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4)
+def get_mistral_client(api_key: str):
+    from mistralai import Mistral
+
+    return Mistral(api_key=api_key)
+
+
+@lru_cache(maxsize=4)
+def get_gemini_client(api_key: str):
+    from google import genai
+
+    return genai.Client(api_key=api_key)
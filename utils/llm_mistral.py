@@ -2,10 +2,14 @@
 # -*- coding: utf-8 -*-
 
 import os
-from typing import Optional
 from dotenv import load_dotenv
 from mistralai import Mistral
 
+try:
+    from utils.llm_cache import cached_llm
+except ImportError:  # exécution directe depuis utils/ (tests manuels)
+    from llm_cache import cached_llm
+
 load_dotenv()
 
 client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
@@ -15,6 +19,7 @@ client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
 # Appel générique Mistral (CAG / RAG / synthèse)
 # ============================================================
 
+@cached_llm
 def call_mistral(
     *,
     model: str,
@@ -25,6 +30,7 @@ def call_mistral(
 ) -> str:
     """
     Appel LLM Mistral (ministral / mistral-medium)
+    temperature=0 → réponse mise en cache (utils/llm_cache.py)
     """
 
     response = client.chat.complete(
@@ -38,3 +44,4 @@ def call_mistral(
     )
 
     return response.choices[0].message.content.strip()
+
@@ -7,6 +7,11 @@ from typing import Optional, Literal, Dict, Any
 from openai import OpenAI
 from dotenv import load_dotenv
 
+try:
+    from utils.llm_cache import cached_llm
+except ImportError:  # exécution directe depuis utils/ (tests manuels)
+    from llm_cache import cached_llm
+
 load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -18,6 +23,7 @@ ReasoningEffort = Literal["low", "medium", "high"]
 # GPT-4.x (Responses API, temperature-based)
 # ============================================================
 
+@cached_llm
 def call_gpt_4(
     *,
     model: str,
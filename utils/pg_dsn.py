@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+pg_dsn.py — DSN Postgres partagé par les pools asyncpg (règlements, historique)
+-------------------------------------------------------------------------------
+DATABASE_URL si défini, sinon variables SUPABASE_* (port 5432 sur le pooler → 6543).
+"""
+
+import os
+
+
+def database_dsn() -> str:
+    dsn = (os.environ.get("DATABASE_URL") or "").strip()
+    if dsn:
+        return dsn.replace("postgresql+psycopg2://", "postgresql://").replace(
+            "postgresql+psycopg://", "postgresql://"
+        )
+    host = (os.getenv("SUPABASE_HOST") or "").strip().strip('"').strip("'")
+    db = (os.getenv("SUPABASE_DB") or "").strip().strip('"').strip("'")
+    user = (os.getenv("SUPABASE_USER") or "").strip().strip('"').strip("'")
+    password = (os.getenv("SUPABASE_PASSWORD") or "").strip().strip('"').strip("'")
+    port = (os.getenv("SUPABASE_PORT") or "5432").strip().strip('"').strip("'")
+    if host and "pooler.supabase.com" in host and port == "5432":
+        port = "6543"
+    if not all([host, db, user, password]):
+        raise RuntimeError("DATABASE_URL ou variables SUPABASE_* requises")
+    return f"postgresql://{user}:{password}@{host}:{port}/{db}"
+
+
+def uses_pgbouncer(dsn: str) -> bool:
+    return "pooler.supabase.com" in dsn or ":6543" in dsn